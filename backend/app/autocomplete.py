@@ -0,0 +1,334 @@
+"""
+In-memory autocomplete over high-cardinality project fields.
+
+For each field in AUTOCOMPLETE_FIELDS the index keeps the distinct values with
+their occurrence counts, a sorted word list for prefix lookups (1-2 character
+queries) and a trigram posting list for substring lookups (3+ characters), so
+a suggestion is answered from memory without touching the database.
+
+The index is built at startup. Write paths publish their committed changes
+(events.py); the subscriber only records the affected id_roots, and the next
+lookup re-reads just those rows and adjusts the counts. Other workers' changes
+arrive through the change feed relay (feed.py, see changed_elsewhere).
+"""
+import heapq
+import operator
+import os
+import sys
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import events, models
+
+AUTOCOMPLETE_ENABLED = os.getenv("AUTOCOMPLETE_ENABLED", "true").lower() == "true"
+# Pending changes above this size rebuild the index instead of re-reading rows
+AUTOCOMPLETE_REBUILD_THRESHOLD = int(os.getenv("AUTOCOMPLETE_REBUILD_THRESHOLD", "5000"))
+
+AUTOCOMPLETE_FIELDS = ("entitas_terminal", "pic", "penyedia_jasa", "asset_categories", "id_investasi")
+
+_READ_BATCH = 500
+_VALUE = operator.itemgetter(1)
+# Remembered results per field, dropped whenever the field's counts change
+_RESULTS_PER_FIELD = 1024
+
+def normalize(text: str) -> str:
+    """Case-fold, strip diacritics and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.split())
+
+
+def _trigrams(key: str) -> set[str]:
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+def _words(key: str) -> set[str]:
+    """
+    Words after the start of a normalized value ("pt waskita karya" -> waskita,
+    karya; "inv-000123" -> 000123); matches at the start are found by prefix.
+    """
+    words = set()
+    for word in key.split():
+        words.add(word)
+        words.update(part for part in word.replace("/", "-").replace(".", "-").split("-") if part)
+    return {word for word in words if not key.startswith(word)}
+
+
+class FieldIndex:
+    """Distinct values of one field with counts, prefix, word-prefix and trigram lookups."""
+
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+        self._keys: dict[str, str] = {}
+        # (normalized value, value) and (word, value), sorted: a prefix is a bisect range
+        self._sorted: list[tuple[str, str]] = []
+        self._words: list[tuple[str, str]] = []
+        self._trigrams: dict[str, set[str]] = {}
+        self._results: dict[tuple[str, int], tuple[list[tuple[str, int]], int]] = {}
+
+    def add(self, value: str) -> None:
+        if value in self.counts:
+            self.counts[value] += 1
+            self._forget_results(self._keys[value])
+            return
+        key = normalize(value)
+        self._forget_results(key)
+        self.counts[value] = 1
+        self._keys[value] = key
+        insort(self._sorted, (key, value))
+        for word in _words(key):
+            insort(self._words, (word, value))
+        for gram in _trigrams(key):
+            self._trigrams.setdefault(gram, set()).add(value)
+
+    def remove(self, value: str) -> None:
+        count = self.counts.get(value)
+        if count is None:
+            return
+        self._forget_results(self._keys[value])
+        if count > 1:
+            self.counts[value] = count - 1
+            return
+        del self.counts[value]
+        key = self._keys.pop(value)
+        _discard_sorted(self._sorted, (key, value))
+        for word in _words(key):
+            _discard_sorted(self._words, (word, value))
+        for gram in _trigrams(key):
+            postings = self._trigrams.get(gram)
+            if postings is not None:
+                postings.discard(value)
+                if not postings:
+                    del self._trigrams[gram]
+
+    def _forget_results(self, key: str) -> None:
+        # Only queries this value matches can change
+        if self._results:
+            self._results = {k: r for k, r in self._results.items() if k[0] not in key}
+
+    def _infix_matches(self, key: str) -> set[str]:
+        postings = [self._trigrams.get(gram) for gram in _trigrams(key)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        found = postings[0].intersection(*postings[1:])
+        # Trigrams only narrow the candidates; confirm the substring
+        return {value for value in found if key in self._keys[value]}
+
+    def suggest(self, q: str, limit: int) -> tuple[list[tuple[str, int]], int]:
+        """
+        Best matching values for a query: values equal to it, then values
+        starting with it, then values with a later word starting with it,
+        then (3+ characters) values containing it; the more frequent value
+        first within each group.
+
+        Args:
+            q: Typed text (empty for the most frequent values)
+            limit: Maximum number of values to return
+
+        Returns:
+            Tuple of (value, count) pairs, best first, and the number of
+            matching values
+        """
+        key = normalize(q)
+        remembered = self._results.get((key, limit))
+        if remembered is not None:
+            return remembered
+        count = self.counts.__getitem__
+        # nlargest keeps the (alphabetical) input order among equal counts
+        matches = _prefix_range(self._sorted, key)
+        exact = 0
+        while exact < len(matches) and matches[exact][0] == key:
+            exact += 1
+        tiers = [map(_VALUE, matches[:exact]), map(_VALUE, matches[exact:])]
+        matched = len(matches)
+        if key:
+            later_words = {
+                value for _, value in _prefix_range(self._words, key)
+                if not self._keys[value].startswith(key)
+            }
+            tiers.append(sorted(later_words))
+            matched += len(later_words)
+            # Substring matches would be mostly noise for one or two characters
+            if len(key) >= 3:
+                infix = {
+                    value for value in self._infix_matches(key) - later_words
+                    if not self._keys[value].startswith(key)
+                }
+                tiers.append(sorted(infix))
+                matched += len(infix)
+        top = []
+        for tier in tiers:
+            if len(top) >= limit:
+                break
+            top.extend(heapq.nlargest(limit - len(top), tier, key=count))
+        result = [(value, self.counts[value]) for value in top], matched
+        if len(self._results) >= _RESULTS_PER_FIELD:
+            self._results.clear()
+        self._results[(key, limit)] = result
+        return result
+
+
+def _prefix_range(entries: list[tuple[str, str]], prefix: str) -> list[tuple[str, str]]:
+    return entries[bisect_left(entries, (prefix,)):bisect_left(entries, (prefix + "\U0010ffff",))]
+
+
+def _discard_sorted(entries: list[tuple[str, str]], entry: tuple[str, str]) -> None:
+    position = bisect_left(entries, entry)
+    if position < len(entries) and entries[position] == entry:
+        del entries[position]
+
+
+class AutocompleteIndex:
+    """
+    FieldIndex per autocomplete field plus the indexed values of every
+    project, so a changed row can be subtracted before it is re-added.
+    """
+
+    def __init__(self, fields: tuple[str, ...] = AUTOCOMPLETE_FIELDS):
+        self.fields = fields
+        self.ready = False
+        self._by_field = {name: FieldIndex() for name in fields}
+        self._rows: dict[str, tuple[Optional[str], ...]] = {}
+        self._pending: set[str] = set()
+        self._rebuild = False
+        self._lock = threading.Lock()
+
+    def _statement(self):
+        P = models.ProjectInvest
+        return select(P.id_root, *(getattr(P, name) for name in self.fields))
+
+    def _set_row(self, id_root: str, values: Optional[tuple[Optional[str], ...]]) -> None:
+        """Index a project's current values (None: the project was deleted)."""
+        previous = self._rows.pop(id_root, None) or (None,) * len(self.fields)
+        if values is not None:
+            # Interned: the same terminal or vendor name is shared by thousands of rows
+            values = tuple(sys.intern(v) if isinstance(v, str) and v.strip() else None for v in values)
+            self._rows[id_root] = values
+        for name, old, new in zip(self.fields, previous, values or (None,) * len(self.fields)):
+            # Unchanged fields keep their remembered results
+            if old == new:
+                continue
+            if old is not None:
+                self._by_field[name].remove(old)
+            if new is not None:
+                self._by_field[name].add(new)
+
+    def build(self, db: Session) -> int:
+        """
+        Load every project into a fresh index and swap it in.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Number of distinct values indexed
+        """
+        fresh = AutocompleteIndex(self.fields)
+        with self._lock:
+            # Changes committed while loading are re-read by the next sync
+            self._pending.clear()
+            self._rebuild = False
+        for row in db.execute(self._statement().execution_options(yield_per=10_000)):
+            fresh._set_row(row[0], tuple(row[1:]))
+        with self._lock:
+            self._by_field, self._rows = fresh._by_field, fresh._rows
+            self.ready = True
+        return sum(len(index.counts) for index in self._by_field.values())
+
+    def mark_changed(self, id_roots: Iterable[str]) -> None:
+        with self._lock:
+            self._pending.update(id_roots)
+
+    def invalidate(self) -> None:
+        """Rebuild on the next lookup (changes happened that were not recorded)."""
+        with self._lock:
+            self._rebuild = True
+
+    def needs_sync(self) -> bool:
+        return not self.ready or self._rebuild or bool(self._pending)
+
+    def sync(self, db: Session) -> None:
+        """
+        Bring the index up to date: build it on first use or after
+        invalidate(), otherwise re-read the projects changed since the last
+        sync.
+
+        Args:
+            db: Database session
+        """
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not self.ready or self._rebuild or len(pending) > AUTOCOMPLETE_REBUILD_THRESHOLD:
+            self.build(db)
+            return
+        P = models.ProjectInvest
+        ids = list(pending)
+        current = {}
+        for start in range(0, len(ids), _READ_BATCH):
+            chunk = ids[start:start + _READ_BATCH]
+            for row in db.execute(self._statement().where(P.id_root.in_(chunk))):
+                current[row[0]] = tuple(row[1:])
+        with self._lock:
+            for id_root in ids:
+                self._set_row(id_root, current.get(id_root))
+
+    def suggest(self, field: str, q: str, limit: int = 10) -> dict:
+        """
+        Top values of a field matching the typed text.
+
+        Args:
+            field: One of the indexed fields
+            q: Typed text; empty returns the most frequent values
+            limit: Maximum number of suggestions
+
+        Returns:
+            Dictionary with items (value and count, best first) and the
+            number of matching values
+        """
+        with self._lock:
+            top, matched = self._by_field[field].suggest(q, limit)
+        return {"items": [{"value": value, "count": count} for value, count in top], "matched": matched}
+
+
+index = AutocompleteIndex()
+
+
+@events.subscribe
+def _on_change(change: events.ProjectChange) -> None:
+    """Record the changed projects; the next lookup re-reads them."""
+    if AUTOCOMPLETE_ENABLED and change.id_roots:
+        index.mark_changed(change.id_roots)
+
+
+def changed_elsewhere(id_roots: Optional[list[str]]) -> None:
+    """
+    Record changes committed by another worker.
+
+    Args:
+        id_roots: Changed projects, or None if they are not all known (e.g. a
+            truncated feed message or missed notifications): rebuild
+    """
+    if not AUTOCOMPLETE_ENABLED:
+        return
+    if id_roots is None:
+        index.invalidate()
+    else:
+        index.mark_changed(id_roots)
+
+
+def needs_sync() -> bool:
+    return index.needs_sync()
+
+
+def sync(db: Session) -> None:
+    index.sync(db)
+
+
+def suggest(field: str, q: str, limit: int = 10) -> dict:
+    return index.suggest(field, q, limit)
@@ -0,0 +1,90 @@
+"""
+In-process caches.
+TTLCache is a thread-safe LRU with per-entry expiry and hit/miss counters,
+shared by the API hot paths that would otherwise repeat identical lookups.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after a per-entry TTL.
+
+    Args:
+        maxsize: Maximum number of entries; the least recently used is evicted
+        ttl: Default time to live in seconds
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or default if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= now:
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value; ttl overrides the default and is ignored if not positive."""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Drop every entry for which predicate(key, value) is true.
+
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            keys = [k for k, (_, v) in self._data.items() if predicate(k, v)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Size and hit/miss counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,244 @@
+"""
+Response compression middleware (pure ASGI, works with streaming responses).
+Negotiates zstd, brotli or gzip from Accept-Encoding; zstd and brotli are
+used only when the `zstandard` / `brotli` packages are installed. Bodies under
+COMPRESSION_MIN_SIZE and non-text content types (XLSX, Parquet, images) are
+sent as is, and so are server-sent event streams.
+
+Compressed responses carry an ETag suffixed with the encoding ("<tag>-gzip"),
+as a strong validator must differ per representation; the suffix is stripped
+from If-None-Match before the request reaches the application.
+"""
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))      # bytes, 0 compresses everything
+COMPRESSION_ENCODINGS = [                                                  # server preference order
+    e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()
+]
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+# Compressors buffer output, which would hold server-sent events back
+STREAMING_TYPES = ("text/event-stream",)
+
+
+class _Gzip:
+    def __init__(self):
+        self._z = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.compress(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+
+def available_encodings() -> dict:
+    """Encodings usable in this process, in server preference order."""
+    codecs = {"gzip": _Gzip}
+    if brotli is not None:
+        codecs["br"] = _Brotli
+    if zstandard is not None:
+        codecs["zstd"] = _Zstd
+    return {name: codecs[name] for name in COMPRESSION_ENCODINGS if name in codecs}
+
+
+def negotiate(accept_encoding: str, encodings: dict) -> Optional[str]:
+    """
+    Pick the encoding for a request.
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding header
+        encodings: Candidate encodings in server preference order
+
+    Returns:
+        The accepted encoding with the highest q-value (ties go to the server's
+        preference), or None to send the body uncompressed
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for name in encodings:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def _strip_encoding_suffixes(if_none_match: str, encodings) -> str:
+    tags = []
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        for name in encodings:
+            suffix = f'-{name}"'
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)] + '"'
+                break
+        tags.append(tag)
+    return ", ".join(tags)
+
+
+class CompressionMiddleware:
+    """Compress HTTP responses with the best encoding the client accepts."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate(headers.get("accept-encoding", ""), self.encodings)
+        # A 304 answers with the validator the client sent, suffix included
+        revalidating_encoded = encoding is not None and f'-{encoding}"' in headers.get("if-none-match", "")
+        if "if-none-match" in headers:
+            scope = dict(scope)
+            scope["headers"] = [
+                (k, _strip_encoding_suffixes(v.decode("latin-1"), self.encodings).encode("latin-1"))
+                if k == b"if-none-match" else (k, v)
+                for k, v in scope["headers"]
+            ]
+        codec = self.encodings[encoding] if encoding else None
+        await _CompressedResponder(
+            self.app, encoding, codec, self.minimum_size, revalidating_encoded
+        )(scope, receive, send)
+
+
+class _CompressedResponder:
+    """
+    Wraps `send` for one request, compressing the body when it qualifies
+    (encoding None: nothing acceptable, only Vary is added).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encoding: Optional[str],
+        codec,
+        minimum_size: int,
+        revalidating_encoded: bool
+    ):
+        self.app = app
+        self.encoding = encoding
+        self.codec = codec
+        self.minimum_size = minimum_size
+        self.revalidating_encoded = revalidating_encoded
+        self.start: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            self.start["status"] not in (204, 304)
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith(STREAMING_TYPES)
+        )
+
+    def _suffix_etag(self, headers: MutableHeaders) -> None:
+        etag = headers.get("etag")
+        if etag and etag.endswith('"') and not etag.startswith("W/"):
+            headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+
+    def _prepare_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        self._suffix_etag(headers)
+        if "content-length" in headers:
+            del headers["content-length"]
+
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the start message until the first body chunk shows the size
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            eligible = self._eligible(headers)
+            if not eligible or self.codec is None or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                if eligible:
+                    headers.add_vary_header("Accept-Encoding")
+                elif self.start["status"] == 304 and self.revalidating_encoded:
+                    self._suffix_etag(headers)
+                    headers.add_vary_header("Accept-Encoding")
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.compressor = self.codec()
+            self._prepare_headers(headers)
+            if not more_body:
+                data = self.compressor.compress(body) + self.compressor.flush()
+                headers["Content-Length"] = str(len(data))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            await self.send(self.start)
+
+        data = self.compressor.compress(body)
+        if not more_body:
+            data += self.compressor.flush()
+        if data or not more_body:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
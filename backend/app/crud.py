@@ -2,12 +2,101 @@
 CRUD operations for project investment data.
 Provides database operations with proper error handling.
 """
+import json
+from datetime import datetime, timezone
+from enum import Enum
 from typing import Optional
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased, load_only
+from sqlalchemy import delete, exists, func, literal, select, text, tuple_, update, or_, and_
+from sqlalchemy.dialects import postgresql, sqlite
 
-from . import models, schemas
+from . import events, models, monthly, schemas, rollup, sync
+from .pagination import encode_cursor, decode_cursor
+
+
+# Sortable monitor columns mapped to a NULL-safe sort expression.
+# Keyset comparisons need total ordering, so NULLs are folded into a sentinel.
+_monitor = models.MonitorInvestRollup.__table__
+MONITOR_SORT_COLUMNS = {
+    "ref_id_root": _monitor.c.ref_id_root,
+    "original_id_investasi": func.coalesce(_monitor.c.original_id_investasi, ""),
+    "klaster_regional": func.coalesce(_monitor.c.klaster_regional, ""),
+    "entitas_terminal": func.coalesce(_monitor.c.entitas_terminal, ""),
+    "asset_categories": func.coalesce(_monitor.c.asset_categories, ""),
+    "status_investasi": func.coalesce(_monitor.c.status_investasi, ""),
+    "tahun_rkap": func.coalesce(_monitor.c.tahun_rkap, 0),
+    "kebutuhan_dana": func.coalesce(_monitor.c.kebutuhan_dana, 0),
+    "rkap": func.coalesce(_monitor.c.rkap, 0),
+    "nilai_kontrak": func.coalesce(_monitor.c.nilai_kontrak, 0),
+}
+
+# Dimensions accepted by get_aggregate_stats(group_by=...)
+AGGREGATE_GROUP_COLUMNS = {
+    "klaster_regional": models.ProjectInvest.klaster_regional,
+    "entitas_terminal": models.ProjectInvest.entitas_terminal,
+    "asset_categories": models.ProjectInvest.asset_categories,
+    "type_investasi": models.ProjectInvest.type_investasi,
+    "status_investasi": models.ProjectInvest.status_investasi,
+}
+
+# Longest month range accepted by get_monthly_series
+MAX_MONTHLY_RANGE = 120
+
+# Monthly columns summed by get_aggregate_stats, per measure
+_MONTHLY_MEASURES = {
+    "rkap": [f"rkap_{m}" for m in rollup.MONTHS],
+    "realisasi": [f"realisasi_{m}" for m in rollup.MONTHS],
+    "prognosa": [f"prognosa_{m}" for m in rollup.MONTHS[:-1]] + ["prognosa_sd_desember"],
+}
+
+
+class ProjectExistsError(Exception):
+    """Raised by create_project when the id_root or id_investasi is already taken."""
+
+    def __init__(self, field: str, value: str):
+        super().__init__(f"Project with {field} '{value}' already exists")
+        self.field = field
+        self.value = value
+
+
+class StaleUpdateError(Exception):
+    """Raised when an update's expected_updated_at no longer matches the stored row."""
+
+    def __init__(self, id_root: str, current_updated_at):
+        super().__init__(
+            f"Project '{id_root}' was modified at {current_updated_at}; reload it and retry"
+        )
+        self.id_root = id_root
+        self.current_updated_at = current_updated_at
+
+
+# Dialect INSERTs supporting ON CONFLICT DO NOTHING
+_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Request fields that are not columns
+_NON_COLUMN_FIELDS = {"expected_updated_at"}
+
+
+def _project_filters(
+    klaster_regional: Optional[str] = None,
+    tahun_rkap: Optional[int] = None,
+    status_issue: Optional[str] = None
+) -> list:
+    """WHERE clauses shared by the project list endpoints."""
+    clauses = []
+    if klaster_regional:
+        clauses.append(models.ProjectInvest.klaster_regional == klaster_regional)
+    if tahun_rkap:
+        clauses.append(models.ProjectInvest.tahun_rkap == tahun_rkap)
+    if status_issue:
+        clauses.append(models.ProjectInvest.status_issue == status_issue)
+    return clauses
+
+
+def _load_only(columns: list[str]):
+    """Loader option restricting a ProjectInvest query to the given columns."""
+    return load_only(*(getattr(models.ProjectInvest, c) for c in columns))
 
 
 def get_projects(
@@ -16,7 +105,8 @@ def get_projects(
     limit: int = 100,
     klaster_regional: Optional[str] = None,
     tahun_rkap: Optional[int] = None,
-    status_issue: Optional[str] = None
+    status_issue: Optional[str] = None,
+    columns: Optional[list[str]] = None
 ) -> tuple[list[models.ProjectInvest], int]:
     """
     Get list of projects with optional filtering and pagination.
@@ -28,25 +118,25 @@ def get_projects(
         klaster_regional: Filter by regional cluster
         tahun_rkap: Filter by RKAP year
         status_issue: Filter by issue status
+        columns: Only load these columns (None for all)
     
     Returns:
         Tuple of (projects list, total count)
     """
     query = db.query(models.ProjectInvest)
+    if columns:
+        query = query.options(_load_only(columns))
     
     # Apply filters
-    if klaster_regional:
-        query = query.filter(models.ProjectInvest.klaster_regional == klaster_regional)
-    if tahun_rkap:
-        query = query.filter(models.ProjectInvest.tahun_rkap == tahun_rkap)
-    if status_issue:
-        query = query.filter(models.ProjectInvest.status_issue == status_issue)
+    query = query.filter(*_project_filters(klaster_regional, tahun_rkap, status_issue))
     
     # Get total count before pagination
     total = query.count()
     
-    # Apply pagination and ordering
-    projects = query.order_by(models.ProjectInvest.created_at.desc())\
+    # Apply pagination and ordering (id_root breaks created_at ties, matching
+    # idx_project_invest_created and the keyset order of get_projects_keyset)
+    projects = query.order_by(models.ProjectInvest.created_at.desc(),
+                              models.ProjectInvest.id_root.desc())\
                    .offset(skip)\
                    .limit(limit)\
                    .all()
@@ -54,6 +144,229 @@ def get_projects(
     return projects, total
 
 
+def _estimate_count(db: Session, query) -> Optional[int]:
+    """Planner row estimate for a SELECT (PostgreSQL only, None elsewhere)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    sql = query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def get_projects_keyset(
+    db: Session,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    klaster_regional: Optional[str] = None,
+    tahun_rkap: Optional[int] = None,
+    status_issue: Optional[str] = None,
+    count: str = "none",
+    columns: Optional[list[str]] = None
+) -> dict:
+    """
+    Get one keyset page of projects, newest first.
+    Rows are ordered by (created_at DESC, id_root DESC) and pages continue
+    from the boundary row with a row-value comparison, so every page costs
+    the same index range scan regardless of depth.
+    
+    Args:
+        db: Database session
+        limit: Maximum number of records to return
+        cursor: next_cursor or prev_cursor of a previous page (None for the first page)
+        klaster_regional: Filter by regional cluster
+        tahun_rkap: Filter by RKAP year
+        status_issue: Filter by issue status
+        count: "exact" to count matching rows, "estimate" for the planner
+            estimate (PostgreSQL; exact elsewhere), "none" to skip counting
+        columns: Only load these columns (None for all; must include created_at)
+    
+    Returns:
+        Dictionary with items, next_cursor, prev_cursor, total and total_estimated
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    Project = models.ProjectInvest
+    key = tuple_(Project.created_at, Project.id_root)
+    filters = _project_filters(klaster_regional, tahun_rkap, status_issue)
+    query = select(Project).where(*filters)
+    if columns:
+        query = query.options(_load_only(columns))
+    
+    # Resume after (next) or before (prev) the boundary row of the previous page
+    backward = False
+    if cursor:
+        payload = decode_cursor(cursor)
+        if payload.get("d") not in ("next", "prev") or len(payload["v"]) != 2:
+            raise ValueError("Malformed cursor")
+        backward = payload["d"] == "prev"
+        boundary = tuple_(*payload["v"])
+        query = query.where(key > boundary if backward else key < boundary)
+    
+    if backward:
+        query = query.order_by(Project.created_at.asc(), Project.id_root.asc())
+    else:
+        query = query.order_by(Project.created_at.desc(), Project.id_root.desc())
+    
+    # Fetch one extra row to know whether the scan direction has more rows
+    projects = list(db.execute(query.limit(limit + 1)).scalars())
+    more = len(projects) > limit
+    projects = projects[:limit]
+    if backward:
+        projects.reverse()
+    
+    next_cursor = prev_cursor = None
+    if projects:
+        first, last = projects[0], projects[-1]
+        if (more and not backward) or (backward and cursor):
+            next_cursor = encode_cursor([last.created_at, last.id_root], d="next")
+        if (more and backward) or (cursor and not backward):
+            prev_cursor = encode_cursor([first.created_at, first.id_root], d="prev")
+    
+    total, estimated = None, False
+    if count == "estimate":
+        total = _estimate_count(db, select(Project.id_root).where(*filters))
+        estimated = total is not None
+    if count == "exact" or (count == "estimate" and total is None):
+        total = db.execute(select(func.count()).select_from(Project).where(*filters)).scalar()
+    
+    return {
+        "items": projects,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "total": total,
+        "total_estimated": estimated,
+    }
+
+
+def get_data_version(db: Session, include_rollup: bool = False) -> tuple:
+    """
+    Cheap fingerprint of the project data, used to build ETags before running
+    the query a response needs. Inserts and updates move max(updated_at),
+    deletes move the newest tombstone's deleted_at; both are read from the
+    end of an index, so the cost does not grow with the table.
+    
+    Args:
+        db: Database session
+        include_rollup: Also include the monitor rollup's last refresh (rebuilds
+            change rollup rows without touching project_invest)
+    
+    Returns:
+        Tuple of (newest updated_at, newest deleted_at[, newest rollup refreshed_at])
+    """
+    Project = models.ProjectInvest
+    Tombstone = models.ProjectInvestTombstone
+    columns = [
+        select(func.max(Project.updated_at)).scalar_subquery(),
+        select(func.max(Tombstone.deleted_at)).scalar_subquery(),
+    ]
+    if include_rollup:
+        columns.append(select(func.max(models.MonitorInvestRollup.refreshed_at)).scalar_subquery())
+    return tuple(db.execute(select(*columns)).one())
+
+
+def _same_instant(a: Optional[datetime], b: Optional[datetime]) -> bool:
+    """Compare timestamps where one side may be naive UTC (SQLite) and the other aware."""
+    if a is None or b is None:
+        return a is b
+    if (a.tzinfo is None) != (b.tzinfo is None):
+        a, b = (
+            t.astimezone(timezone.utc).replace(tzinfo=None) if t.tzinfo else t for t in (a, b)
+        )
+    return a == b
+
+
+def _check_version(id_root: str, current: Optional[datetime], expected: Optional[datetime]) -> None:
+    if expected is not None and not _same_instant(current, expected):
+        raise StaleUpdateError(id_root, current)
+
+
+def _forget(db: Session, id_root: str) -> None:
+    """Expire a loaded instance so a RETURNING row repopulates all of it (computed columns included)."""
+    instance = db.identity_map.get(db.identity_key(models.ProjectInvest, id_root))
+    if instance is not None:
+        db.expire(instance)
+
+
+def _update_one(
+    db: Session,
+    id_root: str,
+    values: dict,
+    expected_updated_at: Optional[datetime] = None,
+    previous_group: bool = False
+) -> tuple[Optional[models.ProjectInvest], Optional[str]]:
+    """
+    Update one project in a single UPDATE ... RETURNING round trip (read,
+    write and refresh when the database has no RETURNING).
+    
+    Args:
+        db: Database session
+        id_root: Project to update
+        values: Column values to set (updated_at is added)
+        expected_updated_at: If set, only update while updated_at still matches
+        previous_group: Also return the id_investasi before the update
+    
+    Returns:
+        Tuple of (updated project or None if not found, previous id_investasi)
+    
+    Raises:
+        StaleUpdateError: If expected_updated_at no longer matches
+    """
+    Project = models.ProjectInvest
+    if not values:
+        project = get_project(db, id_root)
+        if project is not None:
+            _check_version(id_root, project.updated_at, expected_updated_at)
+        return project, project.id_investasi if project is not None else None
+    values = {**values, "updated_at": datetime.utcnow()}
+    
+    if not db.get_bind().dialect.update_returning:
+        project = get_project(db, id_root)
+        if project is None:
+            return None, None
+        _check_version(id_root, project.updated_at, expected_updated_at)
+        old_group = project.id_investasi
+        for field, value in values.items():
+            setattr(project, field, value)
+        db.flush()
+        db.refresh(project)
+        return project, old_group
+    
+    conditions = [Project.id_root == id_root]
+    if expected_updated_at is not None:
+        if expected_updated_at.tzinfo is not None and db.get_bind().dialect.name != "postgresql":
+            # Stored as naive UTC
+            expected_updated_at = expected_updated_at.astimezone(timezone.utc).replace(tzinfo=None)
+        conditions.append(Project.updated_at == expected_updated_at)
+    stmt = update(Project).where(*conditions).values(**values)\
+        .execution_options(synchronize_session=False)
+    _forget(db, id_root)
+    
+    old_group = None
+    if previous_group and db.get_bind().dialect.name == "postgresql":
+        # The self-joined row is read from the pre-update snapshot
+        old = aliased(Project)
+        row = db.execute(
+            stmt.where(old.id_root == Project.id_root).returning(Project, old.id_investasi)
+        ).first()
+        project, old_group = row if row is not None else (None, None)
+    else:
+        if previous_group:
+            old_group = db.execute(
+                select(Project.id_investasi).where(Project.id_root == id_root)
+            ).scalar()
+        project = db.execute(stmt.returning(Project)).scalar()
+    
+    if project is None and expected_updated_at is not None:
+        # No row matched: tell a missing project from a concurrent change
+        current = db.execute(select(Project.updated_at).where(Project.id_root == id_root)).first()
+        if current is not None:
+            raise StaleUpdateError(id_root, current[0])
+    return project, old_group
+
+
 def get_project(db: Session, id_root: str) -> Optional[models.ProjectInvest]:
     """
     Get a single project by its ID.
@@ -106,6 +419,9 @@ def get_projects_by_investasi_id_list(db: Session, id_investasi: str) -> list[mo
 def create_project(db: Session, project: schemas.ProjectCreate) -> models.ProjectInvest:
     """
     Create a new project.
+    On PostgreSQL and SQLite this is one INSERT ... SELECT ... ON CONFLICT DO
+    NOTHING ... RETURNING statement that also enforces the id_investasi
+    uniqueness check; the cause is only looked up when nothing was inserted.
     
     Args:
         db: Database session
@@ -113,11 +429,46 @@ def create_project(db: Session, project: schemas.ProjectCreate) -> models.Projec
     
     Returns:
         Created project
+    
+    Raises:
+        ProjectExistsError: If the id_root or id_investasi is already taken
     """
-    db_project = models.ProjectInvest(**project.model_dump())
-    db.add(db_project)
+    Project = models.ProjectInvest
+    values = project.model_dump()
+    values["created_at"] = values["updated_at"] = datetime.utcnow()
+    dialect = db.get_bind().dialect
+    
+    if dialect.name in _CONFLICT_INSERTS and dialect.insert_returning:
+        columns = Project.__table__.c
+        source = select(*(literal(v, columns[k].type).label(k) for k, v in values.items()))\
+            .where(~exists().where(Project.id_investasi == values["id_investasi"]))
+        stmt = _CONFLICT_INSERTS[dialect.name](Project)\
+            .from_select(list(values), source)\
+            .on_conflict_do_nothing(index_elements=[Project.id_root])\
+            .returning(Project)
+        db_project = db.execute(stmt).scalar()
+        taken = None
+        if db_project is None:
+            taken = db.execute(select(Project.id_root).where(Project.id_root == values["id_root"])).first()
+    else:
+        taken = db.execute(select(Project.id_root).where(Project.id_root == values["id_root"])).first()
+        if taken is None and get_project_by_investasi_id(db, values["id_investasi"]) is None:
+            db_project = Project(**values)
+            db.add(db_project)
+            db.flush()
+            db.refresh(db_project)
+        else:
+            db_project = None
+    if db_project is None:
+        if taken is not None:
+            raise ProjectExistsError("id_root", values["id_root"])
+        raise ProjectExistsError("id_investasi", values["id_investasi"])
+    
+    rollup.refresh_groups(db, [db_project.id_investasi], [db_project.id_root])
+    monthly.sync_projects(db, [db_project.id_root])
+    sync.clear_tombstones(db, [db_project.id_root])
     db.commit()
-    db.refresh(db_project)
+    events.publish(events.CREATE, [db_project.id_root], [db_project.id_investasi])
     return db_project
 
 
@@ -136,18 +487,24 @@ def update_project(
     
     Returns:
         Updated project if found, None otherwise
+    
+    Raises:
+        StaleUpdateError: If project.expected_updated_at no longer matches
     """
-    db_project = get_project(db, id_root)
+    # Update only provided fields
+    update_data = project.model_dump(exclude_unset=True, exclude=_NON_COLUMN_FIELDS)
+    db_project, previous_group = _update_one(
+        db, id_root, update_data, project.expected_updated_at,
+        previous_group="id_investasi" in update_data
+    )
     if not db_project:
         return None
+    previous_group = previous_group if "id_investasi" in update_data else db_project.id_investasi
     
-    # Update only provided fields
-    update_data = project.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_project, field, value)
-    
+    rollup.refresh_groups(db, [previous_group, db_project.id_investasi], [id_root])
+    monthly.sync_projects(db, [id_root])
     db.commit()
-    db.refresh(db_project)
+    events.publish(events.UPDATE, [id_root], [previous_group, db_project.id_investasi], update_data)
     return db_project
 
 
@@ -194,17 +551,19 @@ def update_project_progress(
     
     Returns:
         Updated project if found, None otherwise
+    
+    Raises:
+        StaleUpdateError: If progress.expected_updated_at no longer matches
     """
-    db_project = get_project(db, id_root)
+    update_data = progress.model_dump(exclude_unset=True, exclude_none=True, exclude=_NON_COLUMN_FIELDS)
+    db_project, _ = _update_one(db, id_root, update_data, progress.expected_updated_at)
     if not db_project:
         return None
     
-    update_data = progress.model_dump(exclude_unset=True, exclude_none=True)
-    for field, value in update_data.items():
-        setattr(db_project, field, value)
-    
+    rollup.refresh_groups(db, [db_project.id_investasi], [id_root])
+    monthly.sync_projects(db, [id_root])
     db.commit()
-    db.refresh(db_project)
+    events.publish(events.UPDATE, [id_root], [db_project.id_investasi], update_data)
     return db_project
 
 
@@ -223,23 +582,96 @@ def update_project_issue(
     
     Returns:
         Updated project if found, None otherwise
+    
+    Raises:
+        StaleUpdateError: If issue.expected_updated_at no longer matches
     """
-    db_project = get_project(db, id_root)
+    update_data = issue.model_dump(exclude_unset=True, exclude_none=True, exclude=_NON_COLUMN_FIELDS)
+    db_project, _ = _update_one(db, id_root, update_data, issue.expected_updated_at)
     if not db_project:
         return None
     
-    update_data = issue.model_dump(exclude_unset=True, exclude_none=True)
-    for field, value in update_data.items():
-        setattr(db_project, field, value)
-    
+    rollup.refresh_groups(db, [db_project.id_investasi], [id_root])
     db.commit()
-    db.refresh(db_project)
+    events.publish(events.UPDATE, [id_root], [db_project.id_investasi], update_data)
     return db_project
 
 
+def batch_update_projects(db: Session, items: list[schemas.ProjectBatchItem]) -> list[dict]:
+    """
+    Apply many progress/issue updates with bulk UPDATE statements in one
+    transaction. Items for the same id_root are merged in order (later
+    values win). Updated rows are not re-read.
+    
+    Args:
+        db: Database session
+        items: Batch items keyed by id_root
+    
+    Returns:
+        One result per item: id_root, status ("updated", "unchanged" when the
+        item sets no field, "not_found", "conflict" when its
+        expected_updated_at no longer matches) and the stored updated_at
+    """
+    Project = models.ProjectInvest
+    current = {
+        row.id_root: row for row in db.execute(
+            select(Project.id_root, Project.id_investasi, Project.updated_at)
+            .where(Project.id_root.in_({item.id_root for item in items}))
+            .with_for_update()
+        )
+    }
+    
+    statuses = []
+    changes: dict[str, dict] = {}
+    for item in items:
+        row = current.get(item.id_root)
+        parts = [part for part in (item.progress, item.issue) if part is not None]
+        expected = item.expected_updated_at or next(
+            (part.expected_updated_at for part in parts if part.expected_updated_at), None
+        )
+        if row is None:
+            statuses.append("not_found")
+        elif expected is not None and not _same_instant(row.updated_at, expected):
+            statuses.append("conflict")
+        else:
+            values = {}
+            for part in parts:
+                values.update(part.model_dump(exclude_unset=True, exclude_none=True, exclude=_NON_COLUMN_FIELDS))
+            changes.setdefault(item.id_root, {}).update(values)
+            statuses.append("updated" if values else "unchanged")
+    
+    now = datetime.utcnow()
+    rows = [{"id_root": id_root, **values, "updated_at": now} for id_root, values in changes.items() if values]
+    
+    stamped = {}
+    if rows:
+        # ORM bulk UPDATE by primary key: one executemany per distinct column set
+        db.execute(update(Project), rows)
+        written = [row["id_root"] for row in rows]
+        # Report the stored values: on PostgreSQL the updated_at trigger
+        # replaces ours with the transaction's CURRENT_TIMESTAMP
+        stamped = dict(db.execute(
+            select(Project.id_root, Project.updated_at).where(Project.id_root.in_(written))
+        ).all())
+        groups = [current[r].id_investasi for r in written]
+        rollup.refresh_groups(db, groups, written)
+        monthly.sync_projects(db, [
+            row["id_root"] for row in rows if any(c.startswith("realisasi_") for c in row)
+        ])
+        db.commit()
+        events.publish(events.UPDATE, written, groups, [
+            column for row in rows for column in row if column not in ("id_root", "updated_at")
+        ])
+    
+    return [
+        {"id_root": item.id_root, "status": status, "updated_at": stamped.get(item.id_root) if status == "updated" else None}
+        for item, status in zip(items, statuses)
+    ]
+
+
 def delete_project(db: Session, id_root: str) -> bool:
     """
-    Delete a project by ID.
+    Delete a project by ID (one DELETE ... RETURNING where supported).
     
     Args:
         db: Database session
@@ -248,42 +680,387 @@ def delete_project(db: Session, id_root: str) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    db_project = get_project(db, id_root)
-    if not db_project:
-        return False
+    Project = models.ProjectInvest
+    if db.get_bind().dialect.delete_returning:
+        deleted = db.execute(
+            delete(Project).where(Project.id_root == id_root).returning(Project.id_investasi)
+        ).first()
+        if deleted is None:
+            return False
+        group = deleted[0]
+    else:
+        db_project = get_project(db, id_root)
+        if not db_project:
+            return False
+        group = db_project.id_investasi
+        db.delete(db_project)
     
-    db.delete(db_project)
+    rollup.refresh_groups(db, [group], [id_root])
+    monthly.sync_projects(db, [id_root])
+    sync.record_deletions(db, [(id_root, group)])
     db.commit()
+    events.publish(events.DELETE, [id_root], [group])
     return True
 
 
+def get_aggregate_stats(
+    db: Session,
+    group_by: Optional[list[str]] = None,
+    tahun_rkap: Optional[int] = None,
+    klaster_regional: Optional[str] = None,
+    status_issue: Optional[str] = None
+) -> dict:
+    """
+    Compute dashboard aggregates in a single grouped query.
+    
+    Args:
+        db: Database session
+        group_by: Dimensions to group by (subset of AGGREGATE_GROUP_COLUMNS)
+        tahun_rkap: Optional filter by RKAP year
+        klaster_regional: Optional filter by regional cluster
+        status_issue: Optional filter by issue status
+    
+    Returns:
+        Dictionary with one bucket per group combination plus overall totals
+    
+    Raises:
+        ValueError: If a group_by dimension is not supported
+    """
+    group_by = list(dict.fromkeys(group_by or []))
+    unknown = [g for g in group_by if g not in AGGREGATE_GROUP_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unsupported group_by dimension(s): {', '.join(unknown)}")
+    
+    P = models.ProjectInvest
+    group_columns = [AGGREGATE_GROUP_COLUMNS[g].label(g) for g in group_by]
+    measures = [
+        func.count().label("total_projects"),
+        func.count().filter(P.status_issue == models.StatusIssue.OPEN).label("open_issues"),
+        func.coalesce(func.sum(P.kebutuhan_dana), 0).label("total_kebutuhan_dana"),
+        func.coalesce(func.sum(P.rkap), 0).label("total_rkap"),
+        func.coalesce(func.sum(P.nilai_kontrak), 0).label("total_nilai_kontrak"),
+    ]
+    for measure, fields in _MONTHLY_MEASURES.items():
+        measures += [
+            func.coalesce(func.sum(getattr(P, field)), 0).label(f"{measure}_{i}")
+            for i, field in enumerate(fields)
+        ]
+    
+    query = select(*group_columns, *measures)
+    if tahun_rkap:
+        query = query.where(P.tahun_rkap == tahun_rkap)
+    if klaster_regional:
+        query = query.where(P.klaster_regional == klaster_regional)
+    if status_issue:
+        query = query.where(P.status_issue == status_issue)
+    if group_columns:
+        query = query.group_by(*group_columns).order_by(*group_columns)
+    
+    buckets = []
+    for row in db.execute(query).mappings():
+        bucket = {
+            "group": {g: _group_value(row[g]) for g in group_by},
+            "total_projects": row["total_projects"],
+            "open_issues": row["open_issues"] or 0,
+            "total_kebutuhan_dana": float(row["total_kebutuhan_dana"]),
+            "total_rkap": float(row["total_rkap"]),
+            "total_nilai_kontrak": float(row["total_nilai_kontrak"]),
+        }
+        for measure, fields in _MONTHLY_MEASURES.items():
+            bucket[f"{measure}_bulanan"] = [float(row[f"{measure}_{i}"]) for i in range(len(fields))]
+        bucket["total_realisasi"] = sum(bucket["realisasi_bulanan"])
+        # Prognosa columns are cumulative, so the year-end figure is the yearly total
+        bucket["total_prognosa"] = bucket["prognosa_bulanan"][-1]
+        buckets.append(bucket)
+    
+    return {
+        "group_by": group_by,
+        "buckets": buckets,
+        "totals": _sum_buckets(buckets),
+    }
+
+
+def _group_value(value):
+    """Normalise enum group keys to their string value."""
+    return value.value if isinstance(value, Enum) else value
+
+
+def _sum_buckets(buckets: list[dict]) -> dict:
+    """Fold grouped buckets into an overall total (no extra query needed)."""
+    totals = {
+        "group": {},
+        "total_projects": 0,
+        "open_issues": 0,
+        "total_kebutuhan_dana": 0.0,
+        "total_rkap": 0.0,
+        "total_nilai_kontrak": 0.0,
+        "total_realisasi": 0.0,
+        "total_prognosa": 0.0,
+    }
+    for measure in _MONTHLY_MEASURES:
+        totals[f"{measure}_bulanan"] = [0.0] * 12
+    for bucket in buckets:
+        for key, value in bucket.items():
+            if key == "group":
+                continue
+            if isinstance(value, list):
+                totals[key] = [a + b for a, b in zip(totals[key], value)]
+            else:
+                totals[key] += value
+    return totals
+
+
 def get_summary_stats(db: Session, tahun_rkap: Optional[int] = None) -> dict:
     """
     Get summary statistics for dashboard.
     
     Args:
         db: Database session
-        tahun_rkap: Optional filter by RKAP year
+        tahun_rkap: Optional filter by RKAP year (applies to every figure)
     
     Returns:
         Dictionary with summary statistics
     """
-    query = db.query(models.ProjectInvest)
+    totals = get_aggregate_stats(db, tahun_rkap=tahun_rkap)["totals"]
     
-    if tahun_rkap:
-        query = query.filter(models.ProjectInvest.tahun_rkap == tahun_rkap)
+    return {
+        "total_projects": totals["total_projects"],
+        "total_rkap": totals["total_rkap"],
+        "total_nilai_kontrak": totals["total_nilai_kontrak"],
+        "open_issues": totals["open_issues"]
+    }
+
+
+def _monthly_filters(query, klaster_regional: Optional[str], entitas_terminal: Optional[str]):
+    Monthly = models.ProjectInvestMonthly
+    Project = models.ProjectInvest
+    if klaster_regional or entitas_terminal:
+        query = query.join(Project, Project.id_root == Monthly.id_root)
+    if klaster_regional:
+        query = query.where(Project.klaster_regional == klaster_regional)
+    if entitas_terminal:
+        query = query.where(Project.entitas_terminal == entitas_terminal)
+    return query
+
+
+def _monthly_totals(
+    db: Session,
+    first_year: int,
+    last_year: int,
+    klaster_regional: Optional[str] = None,
+    entitas_terminal: Optional[str] = None
+) -> dict[tuple[int, int], dict[str, float]]:
+    """Sum the fact table per (tahun, bulan) and measure for a range of years."""
+    Monthly = models.ProjectInvestMonthly
+    query = (
+        select(Monthly.tahun, Monthly.bulan, Monthly.measure, func.sum(Monthly.amount))
+        .where(Monthly.tahun.between(first_year, last_year))
+        .group_by(Monthly.tahun, Monthly.bulan, Monthly.measure)
+    )
+    query = _monthly_filters(query, klaster_regional, entitas_terminal)
+
+    totals: dict[tuple[int, int], dict[str, float]] = {}
+    for tahun, bulan, measure, amount in db.execute(query):
+        figures = totals.setdefault((tahun, bulan), dict.fromkeys(monthly.MEASURES, 0.0))
+        figures[measure] = float(amount or 0)
+    return totals
+
+
+def get_monthly_series(
+    db: Session,
+    start: tuple[int, int],
+    end: tuple[int, int],
+    klaster_regional: Optional[str] = None,
+    entitas_terminal: Optional[str] = None
+) -> dict:
+    """
+    Get RKAP, realization and prognosis totals per month over a month range.
     
-    total_projects = query.count()
-    total_rkap = db.query(func.sum(models.ProjectInvest.rkap)).scalar() or 0
-    total_nilai_kontrak = db.query(func.sum(models.ProjectInvest.nilai_kontrak)).scalar() or 0
+    Args:
+        db: Database session
+        start: First (year, month), inclusive
+        end: Last (year, month), inclusive
+        klaster_regional: Optional filter by regional cluster
+        entitas_terminal: Optional filter by terminal entity
+    
+    Returns:
+        Dictionary with the range and one point per month (months without
+        figures are reported as zero)
     
-    open_issues = query.filter(
-        models.ProjectInvest.status_issue == models.StatusIssue.OPEN
-    ).count()
+    Raises:
+        ValueError: If the range is empty or longer than MAX_MONTHLY_RANGE months
+    """
+    first = start[0] * 12 + start[1] - 1
+    last = end[0] * 12 + end[1] - 1
+    if last < first:
+        raise ValueError("end must not be before start")
+    if last - first + 1 > MAX_MONTHLY_RANGE:
+        raise ValueError(f"Range is limited to {MAX_MONTHLY_RANGE} months")
+    
+    totals = _monthly_totals(db, start[0], end[0], klaster_regional, entitas_terminal)
+    points = []
+    for period in range(first, last + 1):
+        tahun, bulan = divmod(period, 12)
+        figures = totals.get((tahun, bulan + 1), dict.fromkeys(monthly.MEASURES, 0.0))
+        points.append({"tahun": tahun, "bulan": bulan + 1, **figures})
     
     return {
-        "total_projects": total_projects,
-        "total_rkap": float(total_rkap),
-        "total_nilai_kontrak": float(total_nilai_kontrak),
-        "open_issues": open_issues
+        "start": f"{start[0]:04d}-{start[1]:02d}",
+        "end": f"{end[0]:04d}-{end[1]:02d}",
+        "points": points
+    }
+
+
+def get_year_over_year(
+    db: Session,
+    tahun: int,
+    until_bulan: int = 12,
+    klaster_regional: Optional[str] = None,
+    entitas_terminal: Optional[str] = None
+) -> dict:
+    """
+    Compare a year with the previous one, month by month up to until_bulan.
+    
+    Args:
+        db: Database session
+        tahun: Year to report
+        until_bulan: Last month included (year-to-date comparison)
+        klaster_regional: Optional filter by regional cluster
+        entitas_terminal: Optional filter by terminal entity
+    
+    Returns:
+        Dictionary with per-month figures of both years, year-to-date totals
+        and growth percentages (None when the previous year is zero)
+    """
+    totals = _monthly_totals(db, tahun - 1, tahun, klaster_regional, entitas_terminal)
+    empty = dict.fromkeys(monthly.MEASURES, 0.0)
+    
+    months = []
+    total_current = dict(empty)
+    total_previous = dict(empty)
+    for bulan in range(1, until_bulan + 1):
+        current = totals.get((tahun, bulan), empty)
+        previous = totals.get((tahun - 1, bulan), empty)
+        months.append({"bulan": bulan, "current": current, "previous": previous})
+        for measure in ("rkap", "realisasi"):
+            total_current[measure] += current[measure]
+            total_previous[measure] += previous[measure]
+    # Prognosis is cumulative: the year-to-date figure is the last month's value
+    total_current["prognosa"] = months[-1]["current"]["prognosa"]
+    total_previous["prognosa"] = months[-1]["previous"]["prognosa"]
+    
+    growth_pct = {
+        measure: round((total_current[measure] - total_previous[measure]) / total_previous[measure] * 100, 2)
+        if total_previous[measure] else None
+        for measure in monthly.MEASURES
     }
+    return {
+        "tahun": tahun,
+        "previous_tahun": tahun - 1,
+        "until_bulan": until_bulan,
+        "months": months,
+        "total_current": total_current,
+        "total_previous": total_previous,
+        "growth_pct": growth_pct
+    }
+
+
+def get_monitor_invest(
+    db: Session,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort_by: str = "ref_id_root",
+    sort_dir: str = "asc",
+    klaster_regional: Optional[list[str]] = None,
+    tahun_rkap: Optional[list[int]] = None,
+    status_issue: Optional[list[str]] = None,
+    type_investasi: Optional[list[str]] = None,
+    entitas_terminal: Optional[list[str]] = None,
+    q: Optional[str] = None
+) -> tuple[list[dict], Optional[str]]:
+    """
+    Get one keyset page of aggregated monitor rows from the rollup table.
+    
+    Args:
+        db: Database session
+        limit: Maximum number of rows to return
+        cursor: Opaque cursor from a previous page (None for the first page)
+        sort_by: Sort column (one of MONITOR_SORT_COLUMNS)
+        sort_dir: "asc" or "desc"
+        klaster_regional: Filter by regional cluster(s)
+        tahun_rkap: Filter by RKAP year(s)
+        status_issue: Filter by issue status(es)
+        type_investasi: Filter by investment type(s)
+        entitas_terminal: Filter by terminal entity(ies)
+        q: Case-insensitive free-text search
+    
+    Returns:
+        Tuple of (rows as dicts, next cursor or None on the last page)
+    
+    Raises:
+        ValueError: If sort_by is unknown or the cursor is malformed
+    """
+    if sort_by not in MONITOR_SORT_COLUMNS:
+        raise ValueError(f"Unsupported sort column '{sort_by}'")
+    sort_expr = MONITOR_SORT_COLUMNS[sort_by]
+    tie_breaker = _monitor.c.ref_id_root
+    descending = sort_dir == "desc"
+    
+    query = select(_monitor)
+    
+    # Apply filters
+    if klaster_regional:
+        query = query.where(_monitor.c.klaster_regional.in_(klaster_regional))
+    if tahun_rkap:
+        query = query.where(_monitor.c.tahun_rkap.in_(tahun_rkap))
+    if status_issue:
+        query = query.where(_monitor.c.status_issue.in_(status_issue))
+    if type_investasi:
+        query = query.where(_monitor.c.type_investasi.in_(type_investasi))
+    if entitas_terminal:
+        query = query.where(_monitor.c.entitas_terminal.in_(entitas_terminal))
+    if q:
+        query = query.where(or_(
+            _monitor.c.ref_id_root.icontains(q, autoescape=True),
+            _monitor.c.original_id_investasi.icontains(q, autoescape=True),
+            _monitor.c.project_definition.icontains(q, autoescape=True),
+            _monitor.c.entitas_terminal.icontains(q, autoescape=True),
+            _monitor.c.judul_kontrak.icontains(q, autoescape=True),
+            _monitor.c.pic.icontains(q, autoescape=True),
+        ))
+    
+    # Resume after the last row of the previous page
+    if cursor:
+        payload = decode_cursor(cursor)
+        if payload.get("s") != sort_by or payload.get("d") != sort_dir or len(payload["v"]) != 2:
+            raise ValueError("Cursor does not match the requested sort order")
+        last_sort, last_id = payload["v"]
+        if descending:
+            query = query.where(or_(
+                sort_expr < last_sort,
+                and_(sort_expr == last_sort, tie_breaker < last_id)
+            ))
+        else:
+            query = query.where(or_(
+                sort_expr > last_sort,
+                and_(sort_expr == last_sort, tie_breaker > last_id)
+            ))
+    
+    if descending:
+        query = query.order_by(sort_expr.desc(), tie_breaker.desc())
+    else:
+        query = query.order_by(sort_expr.asc(), tie_breaker.asc())
+    
+    # Fetch one extra row to know whether another page exists
+    query = query.add_columns(sort_expr.label("_sort_key")).limit(limit + 1)
+    rows = [dict(row) for row in db.execute(query).mappings()]
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last["_sort_key"], last["ref_id_root"]], s=sort_by, d=sort_dir)
+    for row in rows:
+        row.pop("_sort_key", None)
+    
+    return rows, next_cursor
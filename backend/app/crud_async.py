@@ -0,0 +1,52 @@
+"""
+Async CRUD operations for the API routers.
+Each function mirrors the one of the same name in crud.py and runs it on an
+AsyncSession via run_sync: the query logic stays in one place, while the
+driver I/O (asyncpg / aiosqlite) is awaited instead of blocking the event loop.
+"""
+import functools
+from typing import Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import autocomplete, crud, rollup, search, sync
+
+
+def _mirror(fn: Callable) -> Callable:
+    """Build an async wrapper running a sync CRUD function on an AsyncSession."""
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    return wrapper
+
+
+# Reads
+get_projects = _mirror(crud.get_projects)
+get_projects_keyset = _mirror(crud.get_projects_keyset)
+get_data_version = _mirror(crud.get_data_version)
+get_project = _mirror(crud.get_project)
+get_project_by_investasi_id = _mirror(crud.get_project_by_investasi_id)
+get_projects_by_investasi_id_list = _mirror(crud.get_projects_by_investasi_id_list)
+get_filter_options = _mirror(crud.get_filter_options)
+get_aggregate_stats = _mirror(crud.get_aggregate_stats)
+get_summary_stats = _mirror(crud.get_summary_stats)
+get_monthly_series = _mirror(crud.get_monthly_series)
+get_year_over_year = _mirror(crud.get_year_over_year)
+get_monitor_invest = _mirror(crud.get_monitor_invest)
+search_projects = _mirror(search.search_projects)
+get_project_changes = _mirror(sync.get_changes)
+
+# Writes
+create_project = _mirror(crud.create_project)
+update_project = _mirror(crud.update_project)
+update_project_progress = _mirror(crud.update_project_progress)
+update_project_issue = _mirror(crud.update_project_issue)
+batch_update_projects = _mirror(crud.batch_update_projects)
+delete_project = _mirror(crud.delete_project)
+
+# Monitor rollup maintenance
+get_rollup_status = _mirror(rollup.get_status)
+rebuild_rollup = _mirror(rollup.rebuild_all)
+
+# Autocomplete index maintenance (re-reads changed projects)
+sync_autocomplete = _mirror(autocomplete.sync)
@@ -0,0 +1,69 @@
+"""
+In-process notifications about committed project data changes.
+Write paths publish a ProjectChange after their transaction commits; caches
+and other derived state subscribe instead of being called from crud directly.
+"""
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+# Change actions
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+IMPORT = "import"
+REBUILD = "rebuild"
+
+
+@dataclass(frozen=True)
+class ProjectChange:
+    """
+    A committed change to project_invest (and therefore the monitor rollup).
+
+    Attributes:
+        action: One of CREATE, UPDATE, DELETE, IMPORT, REBUILD
+        id_roots: Projects written directly (empty for REBUILD)
+        id_investasi: Investment groups affected
+        fields: Columns written by an UPDATE or IMPORT (empty: whole rows)
+    """
+    action: str
+    id_roots: tuple[str, ...] = ()
+    id_investasi: tuple[str, ...] = ()
+    fields: tuple[str, ...] = ()
+
+
+_subscribers: list[Callable[[ProjectChange], None]] = []
+
+
+def subscribe(handler: Callable[[ProjectChange], None]) -> Callable[[ProjectChange], None]:
+    """Register a handler (usable as a decorator). Handlers must be fast and thread-safe."""
+    _subscribers.append(handler)
+    return handler
+
+
+def unsubscribe(handler: Callable[[ProjectChange], None]) -> None:
+    if handler in _subscribers:
+        _subscribers.remove(handler)
+
+
+def publish(
+    action: str,
+    id_roots: Iterable[str] = (),
+    id_investasi: Iterable[Optional[str]] = (),
+    fields: Iterable[str] = ()
+) -> ProjectChange:
+    """
+    Notify subscribers of a committed change.
+    A failing handler is reported and does not affect the others or the caller.
+    """
+    change = ProjectChange(
+        action=action,
+        id_roots=tuple(dict.fromkeys(id_roots)),
+        id_investasi=tuple(dict.fromkeys(g for g in id_investasi if g is not None)),
+        fields=tuple(dict.fromkeys(fields)),
+    )
+    for handler in list(_subscribers):
+        try:
+            handler(change)
+        except Exception as e:
+            print(f"Warning: change handler {getattr(handler, '__name__', handler)} failed: {e}")
+    return change
@@ -0,0 +1,190 @@
+"""
+Streaming bulk export of project_invest and the monitor rollup.
+Rows are read with a server-side cursor (yield_per) and encoded batch by
+batch, so memory stays flat and the first bytes go out immediately.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, Optional
+
+from sqlalchemy import select, Boolean, Integer, Numeric, Date, DateTime
+from sqlalchemy.orm import Session
+
+from . import models
+
+EXPORT_BATCH_SIZE = 2000
+
+SOURCES = {
+    "projects": models.ProjectInvest.__table__,
+    "monitor": models.MonitorInvestRollup.__table__,
+}
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportFormatUnavailable(ValueError):
+    """Raised when a format needs an optional dependency that is not installed."""
+
+
+def _plain(value):
+    """Convert DB values to CSV/JSON friendly scalars (Decimal kept exact as a string)."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_csv(columns: list[str], batches: Iterator[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel detects UTF-8
+    writer.writerow(columns)
+    yield ("\ufeff" + buffer.getvalue()).encode()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(v) for v in row] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+def _encode_ndjson(columns: list[str], batches: Iterator[list]) -> Iterator[bytes]:
+    for rows in batches:
+        yield "".join(
+            json.dumps({c: _plain(v) for c, v in zip(columns, row)}, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode()
+
+
+def _arrow_type(pa, column):
+    if isinstance(column.type, Numeric) and column.type.precision:
+        return pa.decimal128(column.type.precision, column.type.scale or 0)
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us", tz="UTC") if column.type.timezone else pa.timestamp("us")
+    if isinstance(column.type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object collecting Parquet output between row groups."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _encode_parquet(columns: list[str], batches: Iterator[list], table) -> Iterator[bytes]:
+    pa, pq = _require_pyarrow()
+    schema = pa.schema([pa.field(c, _arrow_type(pa, table.c[c])) for c in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in batches:
+            arrays = [
+                pa.array(
+                    [v.value if isinstance(v, enum.Enum) else v for v in values],
+                    type=field.type
+                )
+                for values, field in zip(zip(*rows), schema)
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ExportFormatUnavailable("Parquet export requires the pyarrow package") from e
+    return pa, pq
+
+
+def check_format(fmt: str) -> None:
+    """Fail fast (before streaming starts) if the format cannot be produced."""
+    if fmt == "parquet":
+        _require_pyarrow()
+
+
+def build_query(
+    source: str,
+    klaster_regional: Optional[str] = None,
+    tahun_rkap: Optional[int] = None,
+    status_issue: Optional[str] = None
+):
+    """Build the export SELECT with the same filters as GET /projects."""
+    table = SOURCES[source]
+    query = select(table)
+    if klaster_regional:
+        query = query.where(table.c.klaster_regional == klaster_regional)
+    if tahun_rkap:
+        query = query.where(table.c.tahun_rkap == tahun_rkap)
+    if status_issue:
+        query = query.where(table.c.status_issue == status_issue)
+    return query.order_by(*table.primary_key.columns)
+
+
+def stream_export(
+    session_factory,
+    source: str,
+    fmt: str,
+    **filters
+) -> Iterator[bytes]:
+    """
+    Stream an export as encoded byte chunks.
+    Opens its own session because the response body is produced after the
+    request's dependency-managed session has been closed.
+
+    Args:
+        session_factory: Callable returning a new Session (e.g. SessionLocal)
+        source: "projects" or "monitor"
+        fmt: "csv", "ndjson" or "parquet"
+        filters: klaster_regional / tahun_rkap / status_issue
+
+    Yields:
+        Encoded chunks of the export file
+    """
+    db: Session = session_factory()
+    try:
+        table = SOURCES[source]
+        result = db.execute(
+            build_query(source, **filters).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        columns = list(result.keys())
+        batches = (list(partition) for partition in result.partitions())
+        if fmt == "csv":
+            yield from _encode_csv(columns, batches)
+        elif fmt == "ndjson":
+            yield from _encode_ndjson(columns, batches)
+        else:
+            yield from _encode_parquet(columns, batches, table)
+    finally:
+        db.close()
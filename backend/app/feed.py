@@ -0,0 +1,234 @@
+"""
+Live change feed for dashboards (GET /projects/feed, server-sent events).
+
+Every committed project change (events.py) becomes one `change` event with
+the action, the projects written, the columns written and the investment
+groups whose monitor rollup rows changed, so open dashboards refetch only
+when and what they need instead of polling.
+
+On PostgreSQL the events travel through NOTIFY/LISTEN on FEED_CHANNEL: each
+worker sends its changes with pg_notify and fans out what it hears, so a
+dashboard connected to any worker sees the writes of all of them. Other
+backends use the in-process broker only (one worker).
+
+The relay also passes another worker's changes to this worker's response
+cache (response_cache.py) and autocomplete index (autocomplete.py), and
+invalidates both after the LISTEN connection drops.
+
+A client that falls FEED_QUEUE_SIZE events behind, reconnects with a
+Last-Event-ID this worker no longer has, or was connected while the LISTEN
+connection dropped receives a `resync` event: refetch everything.
+"""
+import asyncio
+import json
+import os
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from . import autocomplete, database, events, response_cache
+
+FEED_ENABLED = os.getenv("FEED_ENABLED", "true").lower() == "true"
+FEED_LISTEN_NOTIFY = os.getenv("FEED_LISTEN_NOTIFY", "true").lower() == "true"   # PostgreSQL only
+FEED_CHANNEL = os.getenv("FEED_CHANNEL", "project_changes")
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", "100"))          # pending events per client
+FEED_REPLAY_SIZE = int(os.getenv("FEED_REPLAY_SIZE", "1000"))       # recent events kept for Last-Event-ID
+FEED_HEARTBEAT_SECONDS = float(os.getenv("FEED_HEARTBEAT_SECONDS", "15"))
+FEED_RETRY_MS = int(os.getenv("FEED_RETRY_MS", "3000"))             # client reconnect delay
+
+# Ids listed per event; larger changes (imports) are sent with "truncated": true
+FEED_MAX_IDS = 100
+_OUTBOX_SIZE = 1000
+_MAX_RECONNECT_DELAY = 30
+
+
+def _sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, separators=(',', ':'))}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def change_message(change: events.ProjectChange) -> dict:
+    """JSON body of a change event (bounded to fit a NOTIFY payload)."""
+    return {
+        "action": change.action,
+        "id_roots": list(change.id_roots[:FEED_MAX_IDS]),
+        "id_investasi": list(change.id_investasi[:FEED_MAX_IDS]),
+        "fields": list(change.fields),
+        "count": len(change.id_roots),
+        "truncated": len(change.id_roots) > FEED_MAX_IDS or len(change.id_investasi) > FEED_MAX_IDS,
+        "at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+    }
+
+
+class Broker:
+    """
+    Fans change events out to the connected clients' queues. All queue work
+    happens on the event loop; publishers on other threads hand over with
+    call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: set[asyncio.Queue] = set()
+        # Event ids are "<worker>-<seq>"; ids of another worker or run mean resync
+        self._worker = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._recent: deque[tuple[int, str]] = deque(maxlen=FEED_REPLAY_SIZE)
+        self._outbox: Optional[asyncio.Queue] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Bind to the running loop; on PostgreSQL, start the LISTEN/NOTIFY relay."""
+        self._loop = asyncio.get_running_loop()
+        if FEED_LISTEN_NOTIFY and database.engine.dialect.name == "postgresql":
+            self._outbox = asyncio.Queue(maxsize=_OUTBOX_SIZE)
+            self._listener = asyncio.create_task(self._relay())
+            print(f"Change feed relayed through LISTEN/NOTIFY on '{FEED_CHANNEL}'")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._listener = self._outbox = self._loop = None
+
+    def publish(self, message: dict) -> None:
+        """Queue a change for every worker's clients (thread-safe)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: dict) -> None:
+        if self._outbox is None:
+            self._fan_out("change", message)
+            return
+        try:
+            self._outbox.put_nowait(message)
+        except asyncio.QueueFull:
+            # The relay is down or far behind; at least this worker's clients hear of it
+            self._fan_out("change", message)
+
+    def _fan_out(self, event: str, message: dict) -> None:
+        self._seq += 1
+        text = _sse(event, message, f"{self._worker}-{self._seq}")
+        self._recent.append((self._seq, text))
+        for queue in self._clients:
+            self._offer(queue, text)
+
+    def _offer(self, queue: asyncio.Queue, text: str) -> None:
+        try:
+            queue.put_nowait(text)
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event: drop the backlog
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_sse("resync", {"reason": "overflow"}))
+
+    def _resync_all(self, reason: str) -> None:
+        for queue in self._clients:
+            self._offer(queue, _sse("resync", {"reason": reason}))
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> asyncio.Queue:
+        """
+        Register a client.
+
+        Args:
+            last_event_id: Last-Event-ID header of a reconnecting client
+
+        Returns:
+            Queue of formatted SSE messages, pre-filled with the events the
+            client missed (or a resync event if they are no longer known)
+        """
+        queue = asyncio.Queue(maxsize=FEED_QUEUE_SIZE)
+        if last_event_id:
+            worker, _, seq = last_event_id.partition("-")
+            oldest = self._recent[0][0] if self._recent else self._seq + 1
+            if worker == self._worker and seq.isdigit() and int(seq) >= oldest - 1:
+                for number, text in self._recent:
+                    if number > int(seq):
+                        self._offer(queue, text)
+            else:
+                self._offer(queue, _sse("resync", {"reason": "unknown_last_event_id"}))
+        self._clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._clients.discard(queue)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.pop("origin", None) != self._worker:
+            # This worker's own writes already reached its caches through events
+            response_cache.invalidate()
+            autocomplete.changed_elsewhere(None if message.get("truncated") else message.get("id_roots", []))
+        self._fan_out("change", message)
+
+    async def _relay(self) -> None:
+        """
+        Hold a LISTEN connection: send queued changes with pg_notify and fan out
+        the notifications of every worker. Reconnects with backoff.
+        """
+        delay, connected_before = 1, False
+        while True:
+            try:
+                async with database.async_engine.connect() as conn:
+                    raw = (await conn.get_raw_connection()).driver_connection
+                    await raw.add_listener(FEED_CHANNEL, self._on_notify)
+                    if connected_before:
+                        # Notifications sent while disconnected were missed
+                        response_cache.invalidate()
+                        autocomplete.changed_elsewhere(None)
+                        self._resync_all("reconnected")
+                    connected_before, delay = True, 1
+                    while not raw.is_closed():
+                        try:
+                            message = await asyncio.wait_for(self._outbox.get(), FEED_HEARTBEAT_SECONDS)
+                        except asyncio.TimeoutError:
+                            continue
+                        try:
+                            payload = json.dumps({**message, "origin": self._worker})
+                            await raw.execute("SELECT pg_notify($1, $2)", FEED_CHANNEL, payload)
+                        except Exception:
+                            self._fan_out("change", message)
+                            raise
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Warning: change feed LISTEN connection failed: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+
+    async def stream(self, last_event_id: Optional[str] = None):
+        """
+        SSE body for one client: retry hint, missed events, then live events
+        with a comment line every FEED_HEARTBEAT_SECONDS to keep proxies from
+        closing the idle connection.
+        """
+        queue = self.subscribe(last_event_id)
+        try:
+            yield f"retry: {FEED_RETRY_MS}\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(queue)
+
+
+broker = Broker()
+
+
+@events.subscribe
+def _on_change(change: events.ProjectChange) -> None:
+    """Forward committed changes to the feed."""
+    if FEED_ENABLED:
+        broker.publish(change_message(change))
@@ -0,0 +1,297 @@
+"""
+Bulk project import from CSV/XLSX uploads.
+Rows are streamed from the file, validated against schemas.ProjectCreate in
+batches and upserted in chunked transactions: COPY into a staging table on
+PostgreSQL, multi-row INSERT ... ON CONFLICT elsewhere.
+"""
+import csv
+import enum
+import io
+from datetime import datetime
+from typing import IO, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import events, models, monthly, schemas, rollup, sync
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+_TABLE = models.ProjectInvest.__table__
+_SCHEMA_FIELDS = set(schemas.ProjectCreate.model_fields)
+_STAGING_TABLE = "_import_project_invest"
+
+
+class UnsupportedImportFormat(ValueError):
+    """Raised when an upload is neither CSV nor XLSX (or XLSX support is missing)."""
+
+
+def _normalise_header(name) -> str:
+    return str(name or "").strip().lower().replace(" ", "_")
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _cells(columns: list[str], values) -> dict:
+    """
+    Map header names to cell values. Blank cells are left out: new projects
+    get the schema default, existing projects keep their stored value.
+    """
+    row = {}
+    for column, value in zip(columns, values):
+        value = _clean(value)
+        if column and value is not None:
+            row[column] = value
+    return row
+
+
+def _read_csv(file: IO[bytes]) -> tuple[list[str], Iterator[tuple[int, dict]]]:
+    stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(stream)
+    columns = [_normalise_header(h) for h in next(reader, [])]
+
+    def rows() -> Iterator[tuple[int, dict]]:
+        try:
+            for line_number, values in enumerate(reader, start=2):
+                row = _cells(columns, values)
+                if row:
+                    yield line_number, row
+        finally:
+            stream.detach()
+
+    return columns, rows()
+
+
+def _read_xlsx(file: IO[bytes]) -> tuple[list[str], Iterator[tuple[int, dict]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise UnsupportedImportFormat("XLSX import requires the openpyxl package") from e
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    sheet_rows = workbook.active.iter_rows(values_only=True)
+    columns = [_normalise_header(h) for h in next(sheet_rows, ())]
+
+    def rows() -> Iterator[tuple[int, dict]]:
+        try:
+            for line_number, values in enumerate(sheet_rows, start=2):
+                row = _cells(columns, values)
+                # Excel stores dates as datetimes; the schema wants plain dates
+                for key, value in row.items():
+                    if isinstance(value, datetime):
+                        row[key] = value.date()
+                if row:
+                    yield line_number, row
+        finally:
+            workbook.close()
+
+    return columns, rows()
+
+
+def read_upload(file: IO[bytes], filename: Optional[str]) -> tuple[list[str], Iterator[tuple[int, dict]]]:
+    """
+    Open an uploaded CSV or XLSX file for streaming.
+
+    Args:
+        file: Binary file object of the upload
+        filename: Original file name, used to pick the parser
+
+    Returns:
+        Tuple of (normalised header columns, iterator of (line number, row dict))
+
+    Raises:
+        UnsupportedImportFormat: If the file type is not supported
+    """
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return _read_csv(file)
+    if name.endswith(".xlsx"):
+        return _read_xlsx(file)
+    raise UnsupportedImportFormat("Only .csv and .xlsx files are supported")
+
+
+def _validate(batch: list[tuple[int, dict]], header: set[str], report: dict) -> list[tuple[dict, frozenset]]:
+    """
+    Validate raw rows, recording failures.
+    Returns DB-ready row dicts, each with the header columns its cells filled
+    (the columns an existing project gets); when an id_root repeats within
+    the batch the last occurrence wins and earlier ones are counted as
+    duplicates.
+    """
+    valid: dict[str, tuple[dict, frozenset]] = {}
+    now = datetime.utcnow()
+    for line_number, raw in batch:
+        try:
+            project = schemas.ProjectCreate.model_validate(raw)
+        except ValidationError as e:
+            _record_error(report, line_number, raw.get("id_root"), [
+                {"field": ".".join(str(p) for p in err["loc"]), "message": err["msg"]}
+                for err in e.errors()
+            ])
+            continue
+        row = project.model_dump()
+        for key, value in row.items():
+            if isinstance(value, enum.Enum):
+                row[key] = value.value
+        row["created_at"] = now
+        row["updated_at"] = now
+        if row["id_root"] in valid:
+            report["duplicates"] += 1
+        valid[row["id_root"]] = row, frozenset(raw.keys() & header)
+    return list(valid.values())
+
+
+def _record_error(report: dict, line_number: int, id_root, errors: list[dict]) -> None:
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"row": line_number, "id_root": id_root, "errors": errors})
+    else:
+        report["errors_truncated"] = True
+
+
+def _upsert_multirow(db: Session, groups: list[tuple[list[dict], list[str]]]) -> None:
+    """Multi-row INSERT ... ON CONFLICT (id_root) DO UPDATE via executemany, per update column set."""
+    dialect = db.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    for rows, update_columns in groups:
+        stmt = insert(_TABLE)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_TABLE.c.id_root],
+            set_={c: stmt.excluded[c] for c in update_columns},
+        )
+        db.execute(stmt, rows)
+
+
+def _upsert_copy(db: Session, groups: list[tuple[list[dict], list[str]]]) -> None:
+    """COPY rows into a transaction-scoped staging table, then upsert once per update column set."""
+    rows = [row for group_rows, _ in groups for row in group_rows]
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            "" if row[c] is None else row[c].isoformat() if hasattr(row[c], "isoformat") else row[c]
+            for c in columns
+        ])
+    buffer.seek(0)
+
+    column_list = ", ".join(columns)
+    db.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {_STAGING_TABLE} "
+        f"(LIKE project_invest INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    ))
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {_STAGING_TABLE} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+    for group_rows, update_columns in groups:
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in update_columns)
+        db.execute(
+            text(
+                f"INSERT INTO project_invest ({column_list}) "
+                f"SELECT {column_list} FROM {_STAGING_TABLE} WHERE id_root IN :ids "
+                f"ON CONFLICT (id_root) DO UPDATE SET {assignments}"
+            ).bindparams(bindparam("ids", expanding=True)),
+            {"ids": [row["id_root"] for row in group_rows]},
+        )
+
+
+def _write_chunk(db: Session, rows: list[tuple[dict, frozenset]], report: dict, lines: list[int]) -> None:
+    """Upsert one validated chunk in its own transaction, refreshing the monitor rollup."""
+    # Existing rows only get the columns filled in their row; blank cells and
+    # columns missing from the file keep their stored values
+    by_columns: dict[frozenset, list[dict]] = {}
+    for row, filled in rows:
+        by_columns.setdefault(filled, []).append(row)
+    groups = [
+        (group_rows, [c for c in group_rows[0] if c in filled and c != "id_root"] + ["updated_at"])
+        for filled, group_rows in by_columns.items()
+    ]
+    rows = [row for row, _ in rows]
+    id_roots = [r["id_root"] for r in rows]
+    try:
+        previous_groups = db.execute(
+            select(_TABLE.c.id_investasi).where(_TABLE.c.id_root.in_(id_roots)).distinct()
+        ).scalars().all()
+
+        if db.get_bind().dialect.driver == "psycopg2":
+            _upsert_copy(db, groups)
+        else:
+            _upsert_multirow(db, groups)
+
+        investment_groups = set(previous_groups) | {r["id_investasi"] for r in rows}
+        rollup.refresh_groups(db, investment_groups, id_roots)
+        monthly.sync_projects(db, id_roots)
+        sync.clear_tombstones(db, id_roots)
+        db.commit()
+        report["imported"] += len(rows)
+    except Exception as e:
+        db.rollback()
+        for line_number, row in zip(lines, rows):
+            _record_error(report, line_number, row["id_root"], [{"field": None, "message": str(e.__cause__ or e)}])
+        return
+    fields = dict.fromkeys(c for _, update_columns in groups for c in update_columns if c != "updated_at")
+    events.publish(events.IMPORT, id_roots, investment_groups, list(fields))
+
+
+def import_projects(
+    db: Session,
+    file: IO[bytes],
+    filename: Optional[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> dict:
+    """
+    Import projects from an uploaded CSV/XLSX file.
+
+    Args:
+        db: Database session
+        file: Binary file object of the upload
+        filename: Original file name (.csv or .xlsx)
+        chunk_size: Rows validated and written per transaction
+
+    Returns:
+        Import report with row counts and per-row errors
+
+    Raises:
+        UnsupportedImportFormat: If the file type is not supported
+    """
+    report = {
+        "total_rows": 0,
+        "imported": 0,
+        "duplicates": 0,
+        "failed": 0,
+        "errors": [],
+        "errors_truncated": False,
+    }
+    columns, rows = read_upload(file, filename)
+    header = {c for c in columns if c in _SCHEMA_FIELDS}
+
+    batch: list[tuple[int, dict]] = []
+    for line_number, raw in rows:
+        report["total_rows"] += 1
+        batch.append((line_number, raw))
+        if len(batch) >= chunk_size:
+            _flush(db, batch, header, report)
+            batch = []
+    if batch:
+        _flush(db, batch, header, report)
+
+    return report
+
+
+def _flush(db: Session, batch: list[tuple[int, dict]], header: set[str], report: dict) -> None:
+    rows = _validate(batch, header, report)
+    if rows:
+        lines_by_id = {raw.get("id_root"): line for line, raw in batch}
+        _write_chunk(db, rows, report, [lines_by_id.get(row["id_root"]) for row, _ in rows])
@@ -0,0 +1,417 @@
+"""
+Request and SQL instrumentation with Prometheus-format metrics.
+
+An ASGI middleware opens a per-request stats record (in a context variable);
+SQLAlchemy cursor events on every engine, sync and async, add each
+statement's time, and the rows a write affected, to it. Per request this
+yields route, status, latency, DB time, statement count and affected rows,
+which are exported at `/metrics`,
+reported in a `Server-Timing` header and logged for slow requests.
+
+Statements slower than SLOW_QUERY_MS are logged; with SLOW_QUERY_EXPLAIN the
+plan of a slow SELECT is captured by re-running it under EXPLAIN (never
+ANALYZE) on a separate connection in a background thread, off the request
+path. Writes here target rows by key, so their plans are not captured.
+"""
+import os
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+METRICS_ENABLED = _env_flag("METRICS_ENABLED", True)          # middleware, SQL events and /metrics
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))        # 0 disables the slow-query log
+SLOW_QUERY_EXPLAIN = _env_flag("SLOW_QUERY_EXPLAIN", True)      # capture the plan of slow statements
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))   # 0 logs every request, negative disables
+SLOW_QUERY_SQL_MAX = 2000                                       # characters of SQL text in a log line
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+# ---------------------------------------------------------------------------
+# Metric registry (Prometheus text exposition format 0.0.4)
+# ---------------------------------------------------------------------------
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: tuple = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_label_text(self.labelnames, labels)} {value:g}" for labels, value in values.items()]
+
+
+class Gauge(Counter):
+    """Value that goes up and down (inc with a negative amount)."""
+
+    kind = "gauge"
+
+
+class Histogram:
+    """Cumulative histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._values = {}      # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = {labels: list(counts) for labels, counts in self._values.items()}
+        lines = []
+        for labels, counts in values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = 'le="{}"'.format(bound if bound == "+Inf" else f"{bound:g}")
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {counts[-1]:g}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status"),
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency until the response is complete",
+    ("method", "route"),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Time spent executing SQL per request",
+    ("method", "route"),
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements executed per request",
+    ("method", "route"), buckets=STATEMENT_BUCKETS,
+)
+# Writes only: a SELECT's cursor rowcount is -1 on sqlite3 and server-side
+# cursors, and rows are fetched after the statement event fires (the same
+# holds for ... RETURNING on sqlite3, which reports 0 here)
+REQUEST_DB_ROWS_AFFECTED = Counter(
+    "http_request_db_rows_affected_total", "Rows affected by INSERT/UPDATE/DELETE statements, by route",
+    ("method", "route"),
+)
+STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds", "SQL statement execution time",
+    ("operation",),
+)
+SLOW_STATEMENTS = Counter(
+    "db_slow_statements_total", "SQL statements slower than SLOW_QUERY_MS",
+    ("operation",),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served",
+)
+
+_METRICS = (
+    REQUESTS, REQUEST_DURATION, REQUEST_DB_DURATION, REQUEST_DB_STATEMENTS, REQUEST_DB_ROWS_AFFECTED,
+    STATEMENT_DURATION, SLOW_STATEMENTS, REQUESTS_IN_PROGRESS,
+)
+
+
+def _pool_samples() -> list[str]:
+    """Gauges and counters from database.get_pool_status(), read at scrape time."""
+    from . import database
+
+    status = database.get_pool_status()
+    gauges = {
+        "db_pool_size": "Configured pool size",
+        "db_pool_checked_out": "Connections in use",
+        "db_pool_checked_in": "Idle pooled connections",
+        "db_pool_overflow": "Connections opened beyond the pool size",
+    }
+    counters = {
+        "db_pool_checkouts_total": ("count", "Pool checkouts"),
+        "db_pool_checkout_wait_seconds_total": ("total_seconds", "Time spent waiting for a pooled connection"),
+        "db_pool_timeouts_total": ("timeouts", "Checkouts that timed out waiting for a connection"),
+    }
+    lines = []
+    for name, description in gauges.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+        for engine_name in ("sync", "async"):
+            value = status[engine_name].get(name[len("db_pool_"):])
+            if value is not None:
+                lines.append(f'{name}{{engine="{engine_name}"}} {value}')
+    for name, (key, description) in counters.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for engine_name in ("sync", "async"):
+            wait = status[engine_name].get("wait")
+            if wait is not None:
+                lines.append(f'{name}{{engine="{engine_name}"}} {wait[key]:g}')
+    return lines
+
+
+def render_metrics() -> str:
+    """
+    All metrics in the Prometheus text exposition format.
+
+    Returns:
+        Body for GET /metrics
+    """
+    lines = []
+    for metric in _METRICS:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    lines.extend(_pool_samples())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Per-request statistics
+# ---------------------------------------------------------------------------
+
+@dataclass
+class RequestStats:
+    """SQL work attributed to one HTTP request."""
+
+    scope: Scope
+    statements: int = 0
+    db_seconds: float = 0.0
+    rows_affected: int = 0
+
+    @property
+    def route(self) -> str:
+        return route_template(self.scope)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    """Stats of the request being served in this context (None outside requests)."""
+    return _current.get()
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the matched route ('/projects/{id_root:path}'), bounded label values."""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class InstrumentationMiddleware:
+    """Times each HTTP request and attributes the SQL it runs to its route."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                streaming = headers.get("content-type", "").startswith("text/event-stream")
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} statements", '
+                    f"app;dur={elapsed_ms:.1f}",
+                )
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            REQUESTS_IN_PROGRESS.inc(amount=-1)
+            _record_request(scope["method"], stats, status, elapsed, streaming)
+
+
+def _record_request(method: str, stats: RequestStats, status: int, elapsed: float, streaming: bool = False) -> None:
+    route = stats.route
+    REQUESTS.inc((method, route, str(status)))
+    if streaming:
+        # An event stream lasts as long as the client stays connected: not a latency
+        return
+    REQUEST_DURATION.observe(elapsed, (method, route))
+    REQUEST_DB_DURATION.observe(stats.db_seconds, (method, route))
+    REQUEST_DB_STATEMENTS.observe(stats.statements, (method, route))
+    if stats.rows_affected:
+        REQUEST_DB_ROWS_AFFECTED.inc((method, route), stats.rows_affected)
+    if SLOW_REQUEST_MS >= 0 and elapsed * 1000 >= SLOW_REQUEST_MS:
+        print(
+            f"Request {method} {route} -> {status} in {elapsed * 1000:.1f} ms "
+            f"(db {stats.db_seconds * 1000:.1f} ms, {stats.statements} statements, {stats.rows_affected} rows affected)"
+        )
+
+
+# ---------------------------------------------------------------------------
+# SQL statement events and slow-query log
+# ---------------------------------------------------------------------------
+
+_SKIP_OPTION = "skip_instrumentation"
+
+# One EXPLAIN at a time; slow statements seen while it runs are logged without a plan
+_explain_slot = threading.Semaphore(1)
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN <statement>, compiled for the connection's dialect."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def _operation(context, statement: str) -> str:
+    if context.isinsert:
+        return "insert"
+    if context.isupdate:
+        return "update"
+    if context.isdelete:
+        return "delete"
+    verb = statement.lstrip()[:6].upper()
+    return "select" if verb.startswith(("SELECT", "WITH")) else "other"
+
+
+def _explain(statement, parameters: dict, label: str) -> None:
+    """Run EXPLAIN for a slow statement on the blocking engine and print the plan."""
+    from . import database
+
+    try:
+        with database.engine.connect() as conn:
+            conn = conn.execution_options(**{_SKIP_OPTION: True})
+            rows = conn.execute(_Explain(statement), parameters).all()
+            conn.rollback()
+        plan = "\n".join("  " + " | ".join(str(v) for v in row) for row in rows)
+        print(f"Slow query {label} plan:\n{plan}")
+    except Exception as e:
+        print(f"Slow query {label}: EXPLAIN failed: {e}")
+    finally:
+        _explain_slot.release()
+
+
+def _log_slow_statement(context, statement: str, elapsed: float, operation: str, rows_affected: Optional[int]) -> None:
+    SLOW_STATEMENTS.inc((operation,))
+    stats = _current.get()
+    label = f"#{zlib.crc32(statement.encode()):08x}"
+    sql = " ".join(statement.split())[:SLOW_QUERY_SQL_MAX]
+    affected = f", rows affected={rows_affected}" if rows_affected is not None else ""
+    print(
+        f"Slow query {label} {elapsed * 1000:.1f} ms [{stats.route if stats else 'background'}] "
+        f"{operation}{affected}: {sql}"
+    )
+    compiled = context.compiled
+    explainable = (
+        SLOW_QUERY_EXPLAIN
+        and operation == "select"
+        and compiled is not None
+        and not context.executemany
+        and compiled.statement is not None
+    )
+    if explainable and _explain_slot.acquire(blocking=False):
+        threading.Thread(
+            target=_explain,
+            args=(compiled.statement, dict(context.compiled_parameters[0]), label),
+            name="slow-query-explain",
+            daemon=True,
+        ).start()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._instrumentation_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_instrumentation_started", None)
+    if started is None or context.execution_options.get(_SKIP_OPTION):
+        return
+    elapsed = time.perf_counter() - started
+    operation = _operation(context, statement)
+    # rowcount is only meaningful for writes (see REQUEST_DB_ROWS_AFFECTED)
+    write = operation in ("insert", "update", "delete")
+    rows_affected = max(cursor.rowcount, 0) if write and cursor is not None else None
+
+    STATEMENT_DURATION.observe(elapsed, (operation,))
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        stats.rows_affected += rows_affected or 0
+    if SLOW_QUERY_MS > 0 and elapsed * 1000 >= SLOW_QUERY_MS:
+        _log_slow_statement(context, statement, elapsed, operation, rows_affected)
+
+
+def install() -> None:
+    """Attach the statement listeners to every Engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
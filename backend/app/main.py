@@ -5,9 +5,11 @@ Project Management Investment Dashboard API.
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from .routers import projects, auth, monitor
-from .database import engine, Base, SQLITE_FALLBACK_URL
+from . import autocomplete, compression, database, feed, instrumentation, migrations, search, serialization
+from .database import Base
 from .models import ProjectInvest, TypeInvestasi, StatusIssue
 
 
@@ -91,21 +93,96 @@ def seed_sample_data():
         db.close()
 
 
+def sync_monitor_rollup(force: bool = False):
+    """Rebuild the monitor rollup if it is stale (or force, e.g. after new columns were added)."""
+    from .database import SessionLocal
+    from . import rollup
+    db = SessionLocal()
+    try:
+        status = rollup.get_status(db)
+        if force or status["is_stale"]:
+            rebuilt = rollup.rebuild_all(db)
+            print(f"Rebuilt monitor rollup ({rebuilt} rows)")
+    finally:
+        db.close()
+
+
+def sync_monthly_facts():
+    """Fill the monthly fact table on first start (or after it was emptied)."""
+    from .database import SessionLocal
+    from . import monthly
+    db = SessionLocal()
+    try:
+        if monthly.needs_backfill(db):
+            written = monthly.rebuild_all(db)
+            print(f"Backfilled monthly fact table ({written} rows)")
+    finally:
+        db.close()
+
+
+def build_autocomplete_index():
+    """Load the in-memory autocomplete index from project_invest."""
+    from .database import SessionLocal
+    db = SessionLocal()
+    try:
+        distinct = autocomplete.index.build(db)
+        print(f"Built autocomplete index ({distinct} values)")
+    finally:
+        db.close()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler for startup/shutdown."""
-    # Startup: Create tables
-    Base.metadata.create_all(bind=engine)
+    # Startup: Wait for the database (retry/backoff, optional SQLite fallback)
+    await database.wait_for_database()
+    
+    # Create tables
+    Base.metadata.create_all(bind=database.engine)
     print("Database tables created")
     
+    # Add columns and indexes introduced since the tables were created
+    added_columns = migrations.upgrade(database.engine)
+    
+    # Full-text search index (tsvector/GIN or FTS5), filled on first start
+    try:
+        search.install(database.engine)
+    except Exception as e:
+        print(f"Warning: Could not build full-text search index: {e}")
+    
     # Seed sample data for SQLite development mode
     try:
         seed_sample_data()
     except Exception as e:
         print(f"Warning: Could not seed sample data: {e}")
     
+    # Build the monitor rollup on first start (or after it was dropped)
+    try:
+        sync_monitor_rollup(force="monitor_invest_rollup" in added_columns)
+    except Exception as e:
+        print(f"Warning: Could not build monitor rollup: {e}")
+    
+    try:
+        sync_monthly_facts()
+    except Exception as e:
+        print(f"Warning: Could not backfill monthly facts: {e}")
+    
+    # Typeahead values (GET /projects/autocomplete); built lazily if this fails
+    if autocomplete.AUTOCOMPLETE_ENABLED:
+        try:
+            build_autocomplete_index()
+        except Exception as e:
+            print(f"Warning: Could not build autocomplete index: {e}")
+    
+    # Live change feed (GET /projects/feed), over LISTEN/NOTIFY on PostgreSQL
+    if feed.FEED_ENABLED:
+        feed.broker.start()
+    
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: stop the feed relay, release pooled connections
+    await feed.broker.stop()
+    database.engine.dispose()
+    await database.async_engine.dispose()
 
 
 # Create FastAPI application
@@ -115,6 +192,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=serialization.ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -127,6 +205,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request timing, SQL statement counts and slow-query log (GET /metrics)
+if instrumentation.METRICS_ENABLED:
+    instrumentation.install()
+    app.add_middleware(instrumentation.InstrumentationMiddleware)
+
+# Compress JSON/CSV responses (gzip; brotli/zstd when installed and accepted)
+app.add_middleware(compression.CompressionMiddleware)
+
 # Include routers
 app.include_router(projects.router)
 app.include_router(auth.router)
@@ -139,6 +225,20 @@ def health_check():
     return {"status": "healthy", "service": "project-invest-api"}
 
 
+@app.get("/health/db")
+def database_health():
+    """Connection pool metrics: size, checked-out, overflow and checkout wait times."""
+    return database.get_pool_status()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Request, SQL and connection pool metrics in the Prometheus text format."""
+    if not instrumentation.METRICS_ENABLED:
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    return PlainTextResponse(instrumentation.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/")
 def root():
     """Root endpoint with API information."""
@@ -0,0 +1,133 @@
+"""
+Additive schema upgrades applied at startup.
+create_all() only creates missing tables; columns and indexes added to
+existing models (including computed columns) are created here, so databases
+created from database/init.sql or an older release catch up automatically.
+"""
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from .database import Base
+
+
+def _column_ddl(column, dialect) -> str:
+    ddl = str(CreateColumn(column).compile(dialect=dialect))
+    if dialect.name == "sqlite" and column.computed is not None and column.computed.persisted:
+        # SQLite can only add VIRTUAL generated columns to an existing table:
+        # the value is computed on read instead of stored
+        print(f"Warning: {column.table.name}.{column.name} added as VIRTUAL (SQLite cannot add STORED columns)")
+        ddl = ddl.replace(" STORED", " VIRTUAL")
+    return ddl
+
+
+def add_missing_columns(engine: Engine) -> dict[str, list[str]]:
+    """
+    Add model columns that are missing from existing tables.
+
+    Args:
+        engine: Engine of the application database
+
+    Returns:
+        Added column names per table (empty if the schema was up to date)
+    """
+    added: dict[str, list[str]] = {}
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                if not column.nullable and column.server_default is None and column.computed is None:
+                    print(f"Warning: cannot add NOT NULL column {table.name}.{column.name} without a default")
+                    continue
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, conn.dialect)}"
+                )
+                added.setdefault(table.name, []).append(column.name)
+    for table_name, columns in added.items():
+        print(f"Added columns to {table_name}: {', '.join(columns)}")
+    return added
+
+
+def _index_names(conn, table_name: str) -> set[str]:
+    """Index names from the catalog (reflection skips expression indexes on SQLite)."""
+    if conn.dialect.name == "postgresql":
+        query = text("SELECT indexname FROM pg_indexes WHERE tablename = :table")
+    else:
+        query = text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table")
+    return set(conn.execute(query, {"table": table_name}).scalars())
+
+
+def _create_index_concurrently(engine: Engine, index) -> None:
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL: builds without blocking writes,
+    but cannot run inside a transaction, so each index gets an autocommit
+    connection. IF NOT EXISTS lets workers starting together skip an index
+    another worker is already building.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+        conn.exec_driver_sql(re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl))
+
+
+def _invalid_indexes(conn) -> set[str]:
+    """PostgreSQL indexes left invalid by a failed (or still running) concurrent build."""
+    return set(conn.execute(text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+    )).scalars())
+
+
+def create_missing_indexes(engine: Engine) -> list[str]:
+    """
+    Create model indexes that do not exist yet (the declared index set is the
+    source of truth; nothing is dropped). On PostgreSQL they are built
+    concurrently, so writes to the table continue during the build.
+
+    Args:
+        engine: Engine of the application database
+
+    Returns:
+        Names of the indexes created
+    """
+    missing = []
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = _index_names(conn, table.name)
+            missing.extend(index for index in table.indexes if index.name not in present)
+        if conn.dialect.name != "postgresql":
+            for index in missing:
+                index.create(conn)
+    if engine.dialect.name == "postgresql":
+        for index in missing:
+            _create_index_concurrently(engine, index)
+        with engine.connect() as conn:
+            declared = {index.name for table in Base.metadata.sorted_tables for index in table.indexes}
+            for name in sorted(_invalid_indexes(conn) & declared):
+                print(f"Warning: index {name} is invalid (interrupted concurrent build); drop it to rebuild it")
+    created = [index.name for index in missing]
+    if created:
+        print(f"Created indexes: {', '.join(created)}")
+    return created
+
+
+def upgrade(engine: Engine) -> dict[str, list[str]]:
+    """
+    Bring existing tables up to the models: missing columns first, then indexes.
+
+    Returns:
+        Added column names per table
+    """
+    added = add_missing_columns(engine)
+    create_missing_indexes(engine)
+    return added
@@ -4,8 +4,9 @@ SQLAlchemy ORM models for Project Investment Management System.
 import uuid
 from datetime import datetime
 from sqlalchemy import (
-    Column, String, Text, Integer, Numeric, Date, 
-    DateTime, Enum as SQLEnum, TypeDecorator, CHAR
+    Column, String, Text, Integer, SmallInteger, Numeric, Date, Boolean,
+    DateTime, Enum as SQLEnum, TypeDecorator, CHAR, ForeignKey, Index, Computed,
+    func, text
 )
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 import enum
@@ -42,6 +43,25 @@ class GUID(TypeDecorator):
             return uuid.UUID(value) if not isinstance(value, uuid.UUID) else value
 
 
+MONTHS = [
+    "januari", "februari", "maret", "april", "mei", "juni",
+    "juli", "agustus", "september", "oktober", "november", "desember",
+]
+
+
+def _realisasi_sd(month: str) -> str:
+    """SQL for realization summed from January up to and including month."""
+    months = MONTHS[:MONTHS.index(month) + 1]
+    return " + ".join(f"COALESCE(realisasi_{m}, 0)" for m in months)
+
+
+def _versus_rkap(total: str, percent: bool) -> str:
+    """SQL comparing a total with rkap: percentage of rkap, or difference."""
+    if percent:
+        return f"CASE WHEN rkap <> 0 THEN ROUND(({total}) * 100 / rkap, 2) END"
+    return f"({total}) - COALESCE(rkap, 0)"
+
+
 class TypeInvestasi(str, enum.Enum):
     """Enum for investment types."""
     MURNI = "Murni"
@@ -137,6 +157,23 @@ class ProjectInvest(Base):
     prognosa_november = Column(Numeric(18, 2), default=0)
     prognosa_sd_desember = Column(Numeric(18, 2), default=0)
     
+    # Cumulative realization and absorption, computed by the database on every write
+    realisasi_sd_januari = Column(Numeric(18, 2), Computed(_realisasi_sd("januari"), persisted=True))
+    realisasi_sd_februari = Column(Numeric(18, 2), Computed(_realisasi_sd("februari"), persisted=True))
+    realisasi_sd_maret = Column(Numeric(18, 2), Computed(_realisasi_sd("maret"), persisted=True))
+    realisasi_sd_april = Column(Numeric(18, 2), Computed(_realisasi_sd("april"), persisted=True))
+    realisasi_sd_mei = Column(Numeric(18, 2), Computed(_realisasi_sd("mei"), persisted=True))
+    realisasi_sd_juni = Column(Numeric(18, 2), Computed(_realisasi_sd("juni"), persisted=True))
+    realisasi_sd_juli = Column(Numeric(18, 2), Computed(_realisasi_sd("juli"), persisted=True))
+    realisasi_sd_agustus = Column(Numeric(18, 2), Computed(_realisasi_sd("agustus"), persisted=True))
+    realisasi_sd_september = Column(Numeric(18, 2), Computed(_realisasi_sd("september"), persisted=True))
+    realisasi_sd_oktober = Column(Numeric(18, 2), Computed(_realisasi_sd("oktober"), persisted=True))
+    realisasi_sd_november = Column(Numeric(18, 2), Computed(_realisasi_sd("november"), persisted=True))
+    realisasi_sd_desember = Column(Numeric(18, 2), Computed(_realisasi_sd("desember"), persisted=True))
+    persen_penyerapan = Column(Numeric(18, 2), Computed(_versus_rkap(_realisasi_sd("desember"), True), persisted=True))
+    deviasi_rkap = Column(Numeric(18, 2), Computed(_versus_rkap(_realisasi_sd("desember"), False), persisted=True))
+    deviasi_prognosa = Column(Numeric(18, 2), Computed(_versus_rkap("COALESCE(prognosa_sd_desember, 0)", False), persisted=True))
+    
     # Contract Details
     penyedia_jasa = Column(String(500))
     no_kontrak = Column(String(100))
@@ -154,6 +191,82 @@ class ProjectInvest(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Parent (induk) project of its investment group: the '-001' row
+    is_parent = Column(Boolean, Computed("id_root LIKE '%-001'", persisted=True))
+
+    __table_args__ = (
+        # Filters also created by database/init.sql
+        Index("idx_project_invest_klaster", "klaster_regional"),
+        Index("idx_project_invest_tahun_rkap", "tahun_rkap"),
+        Index("idx_project_invest_status_issue", "status_issue"),
+        Index("idx_project_invest_type", "type_investasi"),
+        Index("idx_project_invest_status", "status_investasi"),
+        # get_project_by_investasi_id / get_projects_by_investasi_id_list (ORDER BY created_at DESC)
+        Index("idx_project_invest_investasi_created", "id_investasi", text("created_at DESC")),
+        # Newest-first listing in get_projects, with id_root as tie-breaker
+        Index("idx_project_invest_created", text("created_at DESC"), text("id_root DESC")),
+        # GET /projects/sync keyset (updated_at, id_root); its leading column also
+        # serves max(updated_at) of crud.get_data_version (ETag validators)
+        Index("idx_project_invest_updated_id", "updated_at", "id_root"),
+        # Parent rows only (rollup status, view_monitor_invest); SQLite has no
+        # native boolean, so the predicate matches how SQLAlchemy renders the filter
+        Index(
+            "idx_project_invest_parent", "id_investasi",
+            postgresql_where=text("is_parent"), sqlite_where=text("is_parent = 1"),
+        ),
+        # DISTINCT option lists in get_filter_options
+        Index(
+            "idx_project_invest_tgl_mulai", "tgl_mulai_kontrak",
+            postgresql_where=text("tgl_mulai_kontrak IS NOT NULL"),
+            sqlite_where=text("tgl_mulai_kontrak IS NOT NULL"),
+        ),
+        Index(
+            "idx_project_invest_tgl_selesai", "tanggal_selesai",
+            postgresql_where=text("tanggal_selesai IS NOT NULL"),
+            sqlite_where=text("tanggal_selesai IS NOT NULL"),
+        ),
+        Index("idx_project_invest_kontrak_aktif", "kontrak_aktif"),
+    )
+
+
+class ProjectInvestMonthly(Base):
+    """
+    Long-format monthly figures: one row per project, year, month and measure.
+    Derived from the wide rkap_*/realisasi_*/prognosa_* columns of
+    project_invest by app.monthly on every write; zero/NULL months are omitted.
+    """
+    __tablename__ = "project_invest_monthly"
+
+    id_root = Column(
+        String(100), ForeignKey("project_invest.id_root", ondelete="CASCADE"), primary_key=True
+    )
+    tahun = Column(Integer, primary_key=True)
+    bulan = Column(SmallInteger, primary_key=True)      # 1..12
+    measure = Column(String(20), primary_key=True)      # rkap / realisasi / prognosa
+    amount = Column(Numeric(18, 2), nullable=False)
+
+    __table_args__ = (
+        # Month-range and year-over-year aggregation
+        Index("idx_project_invest_monthly_period", "measure", "tahun", "bulan"),
+    )
+
+
+class ProjectInvestTombstone(Base):
+    """
+    Deleted projects, kept for SYNC_TOMBSTONE_DAYS so clients syncing with
+    GET /projects/sync learn about deletions. Re-creating an id_root removes
+    its tombstone.
+    """
+    __tablename__ = "project_invest_tombstone"
+
+    id_root = Column(String(100), primary_key=True)
+    id_investasi = Column(String(100))
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_project_invest_tombstone_deleted", "deleted_at", "id_root"),
+    )
 
 
 class User(Base):
@@ -169,5 +282,131 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
 
 
+class MonitorInvestRollup(Base):
+    """
+    Materialized rollup of view_monitor_invest.
+    One row per parent project (id_root ending in '-001'), carrying the
+    aggregated figures of every project sharing its id_investasi.
+    Maintained incrementally by app.rollup on every project write.
+    """
+    __tablename__ = "monitor_invest_rollup"
 
+    # Identity
+    id_virtual = Column(Integer, primary_key=True, autoincrement=True)
+    ref_id_root = Column(String(100), unique=True, nullable=False)
+    original_id_investasi = Column(String(100), index=True)
+    
+    # Attributes (taken from the parent row)
+    klaster_regional = Column(String(100))
+    entitas_terminal = Column(String(255))
+    asset_categories = Column(String(255))
+    type_investasi = Column(String(50))
+    tahun_usulan = Column(Integer)
+    project_definition = Column(Text)
+    status_investasi = Column(String(100))
+    
+    # Descriptions (parent value, or the aggregated values of the group)
+    progres_description = Column(Text)
+    issue_description = Column(Text)
+    action_target = Column(Text)
+    issue_categories = Column(String(255))
+    head_office_support_desc = Column(Text)
+    pic = Column(Text)
+    status_issue = Column(Text)
+    
+    # RKAP (group sums)
+    tahun_rkap = Column(Integer)
+    kebutuhan_dana = Column(Numeric(18, 2), default=0)
+    rkap = Column(Numeric(18, 2), default=0)
+    rkap_januari = Column(Numeric(18, 2), default=0)
+    rkap_februari = Column(Numeric(18, 2), default=0)
+    rkap_maret = Column(Numeric(18, 2), default=0)
+    rkap_april = Column(Numeric(18, 2), default=0)
+    rkap_mei = Column(Numeric(18, 2), default=0)
+    rkap_juni = Column(Numeric(18, 2), default=0)
+    rkap_juli = Column(Numeric(18, 2), default=0)
+    rkap_agustus = Column(Numeric(18, 2), default=0)
+    rkap_september = Column(Numeric(18, 2), default=0)
+    rkap_oktober = Column(Numeric(18, 2), default=0)
+    rkap_november = Column(Numeric(18, 2), default=0)
+    rkap_desember = Column(Numeric(18, 2), default=0)
+    
+    # Realization (group sums)
+    realisasi_januari = Column(Numeric(18, 2), default=0)
+    realisasi_februari = Column(Numeric(18, 2), default=0)
+    realisasi_maret = Column(Numeric(18, 2), default=0)
+    realisasi_april = Column(Numeric(18, 2), default=0)
+    realisasi_mei = Column(Numeric(18, 2), default=0)
+    realisasi_juni = Column(Numeric(18, 2), default=0)
+    realisasi_juli = Column(Numeric(18, 2), default=0)
+    realisasi_agustus = Column(Numeric(18, 2), default=0)
+    realisasi_september = Column(Numeric(18, 2), default=0)
+    realisasi_oktober = Column(Numeric(18, 2), default=0)
+    realisasi_november = Column(Numeric(18, 2), default=0)
+    realisasi_desember = Column(Numeric(18, 2), default=0)
+    
+    # Cumulative realization
+    realisasi_sd_januari = Column(Numeric(18, 2), default=0)
+    realisasi_sd_februari = Column(Numeric(18, 2), default=0)
+    realisasi_sd_maret = Column(Numeric(18, 2), default=0)
+    realisasi_sd_april = Column(Numeric(18, 2), default=0)
+    realisasi_sd_mei = Column(Numeric(18, 2), default=0)
+    realisasi_sd_juni = Column(Numeric(18, 2), default=0)
+    realisasi_sd_juli = Column(Numeric(18, 2), default=0)
+    realisasi_sd_agustus = Column(Numeric(18, 2), default=0)
+    realisasi_sd_september = Column(Numeric(18, 2), default=0)
+    realisasi_sd_oktober = Column(Numeric(18, 2), default=0)
+    realisasi_sd_november = Column(Numeric(18, 2), default=0)
+    realisasi_sd_desember = Column(Numeric(18, 2), default=0)
+    
+    # Prognosis (group sums)
+    prognosa_januari = Column(Numeric(18, 2), default=0)
+    prognosa_februari = Column(Numeric(18, 2), default=0)
+    prognosa_maret = Column(Numeric(18, 2), default=0)
+    prognosa_april = Column(Numeric(18, 2), default=0)
+    prognosa_mei = Column(Numeric(18, 2), default=0)
+    prognosa_juni = Column(Numeric(18, 2), default=0)
+    prognosa_juli = Column(Numeric(18, 2), default=0)
+    prognosa_agustus = Column(Numeric(18, 2), default=0)
+    prognosa_september = Column(Numeric(18, 2), default=0)
+    prognosa_oktober = Column(Numeric(18, 2), default=0)
+    prognosa_november = Column(Numeric(18, 2), default=0)
+    prognosa_sd_desember = Column(Numeric(18, 2), default=0)
+    
+    # Absorption vs RKAP (group figures)
+    persen_penyerapan = Column(Numeric(18, 2))      # realisasi_sd_desember / rkap * 100
+    deviasi_rkap = Column(Numeric(18, 2))           # realisasi_sd_desember - rkap
+    deviasi_prognosa = Column(Numeric(18, 2))       # prognosa_sd_desember - rkap
+    
+    # Contract (taken from the parent row)
+    judul_kontrak = Column(String(500))
+    nilai_kontrak = Column(Numeric(18, 2))
+    penyerapan_sd_tahun_lalu = Column(Numeric(18, 2))
+    penyedia_jasa = Column(String(500))
+    no_kontrak = Column(String(100))
+    tanggal_kontrak = Column(Date)
+    tgl_mulai_kontrak = Column(Date)
+    jangka_waktu = Column(Integer)
+    satuan_hari = Column(String(50))
+    tanggal_selesai = Column(Date)
+    
+    # Location
+    latitude = Column(Numeric(10, 7))
+    longitude = Column(Numeric(10, 7))
+    
+    # Timestamps of the parent row
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    
+    # Refresh bookkeeping
+    source_updated_at = Column(DateTime(timezone=True))  # newest updated_at in the group
+    refreshed_at = Column(DateTime(timezone=True), default=datetime.utcnow)
 
+    __table_args__ = (
+        # Sort keys of /monitor/invest: the same NULL-folding expressions as
+        # crud.MONITOR_SORT_COLUMNS, with ref_id_root as keyset tie-breaker
+        Index("idx_monitor_rollup_klaster", func.coalesce(text("klaster_regional"), ""), "ref_id_root"),
+        Index("idx_monitor_rollup_entitas", func.coalesce(text("entitas_terminal"), ""), "ref_id_root"),
+        Index("idx_monitor_rollup_tahun_rkap", func.coalesce(text("tahun_rkap"), 0), "ref_id_root"),
+        Index("idx_monitor_rollup_rkap", func.coalesce(text("rkap"), 0), "ref_id_root"),
+    )
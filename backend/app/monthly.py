@@ -0,0 +1,116 @@
+"""
+Maintenance of the long-format project_invest_monthly fact table.
+The wide monthly columns of project_invest stay the write model (and keep the
+ProjectResponse shape); this module mirrors them into (id_root, tahun, bulan,
+measure, amount) rows in the same transaction, so period queries can use an
+indexed GROUP BY instead of adding up twelve columns.
+"""
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .models import MONTHS
+
+# Wide column per (measure, month number)
+MEASURE_COLUMNS = {
+    "rkap": {i: f"rkap_{m}" for i, m in enumerate(MONTHS, start=1)},
+    "realisasi": {i: f"realisasi_{m}" for i, m in enumerate(MONTHS, start=1)},
+    # Prognosis is cumulative; December is stored as prognosa_sd_desember
+    "prognosa": {
+        **{i: f"prognosa_{m}" for i, m in enumerate(MONTHS[:-1], start=1)},
+        12: "prognosa_sd_desember",
+    },
+}
+MEASURES = list(MEASURE_COLUMNS)
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def fact_rows(project: models.ProjectInvest) -> list[dict]:
+    """
+    Expand one project's wide monthly columns into fact rows.
+    Projects without tahun_rkap have no year to file the figures under and
+    produce no rows.
+    """
+    if project.tahun_rkap is None:
+        return []
+    rows = []
+    for measure, columns in MEASURE_COLUMNS.items():
+        for bulan, column in columns.items():
+            amount = getattr(project, column)
+            if amount:
+                rows.append({
+                    "id_root": project.id_root,
+                    "tahun": project.tahun_rkap,
+                    "bulan": bulan,
+                    "measure": measure,
+                    "amount": Decimal(amount),
+                })
+    return rows
+
+
+def sync_projects(db: Session, id_roots: Iterable[str]) -> None:
+    """
+    Replace the fact rows of the given projects from their current wide columns.
+    Runs inside the caller's transaction; deleted projects lose their rows.
+
+    Args:
+        db: Database session
+        id_roots: Projects written in this transaction
+    """
+    roots = set(id_roots)
+    if not roots:
+        return
+    db.flush()
+
+    Monthly = models.ProjectInvestMonthly
+    db.execute(delete(Monthly).where(Monthly.id_root.in_(roots)))
+    projects = db.execute(
+        select(models.ProjectInvest).where(models.ProjectInvest.id_root.in_(roots))
+    ).scalars()
+    rows = [row for project in projects for row in fact_rows(project)]
+    if rows:
+        db.execute(insert(Monthly), rows)
+
+
+def rebuild_all(db: Session) -> int:
+    """
+    Recompute the whole fact table from project_invest and commit.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of fact rows written
+    """
+    db.execute(delete(models.ProjectInvestMonthly))
+    stream = db.execute(
+        select(models.ProjectInvest).execution_options(yield_per=REBUILD_BATCH_SIZE)
+    ).scalars()
+
+    written = 0
+    pending: list[dict] = []
+    for project in stream:
+        pending.extend(fact_rows(project))
+        if len(pending) >= REBUILD_BATCH_SIZE:
+            db.execute(insert(models.ProjectInvestMonthly), pending)
+            written += len(pending)
+            pending = []
+    if pending:
+        db.execute(insert(models.ProjectInvestMonthly), pending)
+        written += len(pending)
+    db.commit()
+    return written
+
+
+def needs_backfill(db: Session) -> bool:
+    """True if the fact table is empty while projects with an RKAP year exist (e.g. first start)."""
+    if db.execute(select(func.count()).select_from(models.ProjectInvestMonthly)).scalar():
+        return False
+    Project = models.ProjectInvest
+    return bool(db.execute(
+        select(func.count()).select_from(Project).where(Project.tahun_rkap.isnot(None))
+    ).scalar())
@@ -0,0 +1,77 @@
+"""
+Opaque cursor helpers for keyset pagination.
+Cursors carry the sort key values of the last row of a page so the next
+page can be fetched with a WHERE clause instead of OFFSET.
+"""
+import base64
+import binascii
+import enum
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+
+def _encode_value(value: Any) -> Any:
+    """Tag values JSON cannot represent natively so they round-trip with their type."""
+    if isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$dec" in value:
+            return Decimal(value["$dec"])
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$date" in value:
+            return date.fromisoformat(value["$date"])
+        raise ValueError("Unknown cursor value tag")
+    return value
+
+
+def encode_cursor(values: list[Any], **extra: Any) -> str:
+    """
+    Encode keyset values (and optional metadata) as an opaque URL-safe token.
+
+    Args:
+        values: Sort key values of the boundary row, in ORDER BY order
+        extra: Additional metadata to embed (e.g. sort column, direction)
+
+    Returns:
+        URL-safe base64 cursor string
+    """
+    payload = {"v": [_encode_value(v) for v in values], **extra}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor: Opaque cursor string
+
+    Returns:
+        Dictionary with the decoded values under "v" plus any metadata
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(payload, dict) or not isinstance(payload.get("v"), list):
+        raise ValueError("Malformed cursor")
+    payload["v"] = [_decode_value(v) for v in payload["v"]]
+    return payload
@@ -0,0 +1,91 @@
+"""
+Sparse field selection and columnar output for project listings.
+A `fields=` list is pushed down twice: into the SELECT (load_only) and into
+the serialization plan, so unrequested columns are neither read nor
+serialized. The columnar layout sends the column names once and each row as
+an array.
+"""
+from typing import Any, Optional
+
+from . import serialization
+from .schemas import ProjectResponse
+
+PROJECT_FIELDS = tuple(ProjectResponse.model_fields)
+
+# Always loaded: primary key, and the keyset sort column for cursor pages
+REQUIRED_COLUMNS = ("id_root", "created_at")
+
+
+def parse_fields(raw: Optional[str]) -> Optional[list[str]]:
+    """
+    Parse a comma-separated field list, keeping the given order.
+
+    Args:
+        raw: Value of the `fields` query parameter (None or empty for all fields)
+
+    Returns:
+        Deduplicated field names, or None for all fields
+
+    Raises:
+        ValueError: If a name is not a ProjectResponse field
+    """
+    if not raw:
+        return None
+    fields = list(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in ProjectResponse.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields or None
+
+
+def load_columns(fields: list[str]) -> list[str]:
+    """Columns to pass to load_only() for the requested fields."""
+    return list(dict.fromkeys([*REQUIRED_COLUMNS, *fields]))
+
+
+def render(
+    projects: list,
+    fields: Optional[list[str]],
+    layout: str = "objects",
+    **envelope: Any
+) -> bytes:
+    """
+    Serialize a page of ORM projects emitting only the requested attributes.
+
+    Args:
+        projects: ProjectInvest instances (loaded with at least `fields`)
+        fields: Field names to emit (None for every ProjectResponse field)
+        layout: "objects" for a list of objects under `items`, "columnar"
+            for `columns` plus `rows` as arrays
+        envelope: Page metadata emitted next to the items (total, cursors, ...)
+
+    Returns:
+        JSON body
+    """
+    names = tuple(fields or PROJECT_FIELDS)
+    if layout == "columnar":
+        body = {**envelope, "columns": names,
+                "rows": serialization.rows(ProjectResponse, projects, names, arrays=True)}
+    else:
+        body = {**envelope, "items": serialization.rows(ProjectResponse, projects, names)}
+    return serialization.dumps(body)
+
+
+def render_hits(hits: list, fields: Optional[list[str]], **envelope: Any) -> bytes:
+    """
+    Serialize full-text search hits like `render`, adding rank and snippet.
+
+    Args:
+        hits: (project, rank, snippet) tuples from search.search_projects
+        fields: Project field names to emit (None for every field)
+        envelope: Response metadata emitted next to the items (query, total, ...)
+
+    Returns:
+        JSON body
+    """
+    names = tuple(fields or PROJECT_FIELDS)
+    items = serialization.rows(ProjectResponse, [project for project, _, _ in hits], names)
+    for item, (_, rank, snippet) in zip(items, hits):
+        item["rank"] = rank
+        item["snippet"] = snippet
+    return serialization.dumps({**envelope, "items": items})
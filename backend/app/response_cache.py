@@ -0,0 +1,167 @@
+"""
+Cached JSON responses for read-heavy endpoints.
+Serialized bodies are kept with a content ETag, so repeat requests skip the
+database and revalidations (If-None-Match) answer 304 without a body.
+Every committed project change (see events.py) drops the cache. Changes made
+by other workers arrive through the change feed's LISTEN/NOTIFY relay
+(feed.py, PostgreSQL with FEED_ENABLED and FEED_LISTEN_NOTIFY); without it a
+worker serves another worker's stale bodies for up to RESPONSE_CACHE_TTL.
+"""
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, Protocol
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from . import events, serialization
+from .cache import TTLCache
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))           # seconds, 0 disables
+RESPONSE_CACHE_MAXSIZE = int(os.getenv("RESPONSE_CACHE_MAXSIZE", "512"))
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "0"))      # browser max-age, seconds
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class CacheBackend(Protocol):
+    """Storage used by the response cache (TTLCache, or e.g. a shared Redis adapter)."""
+
+    def get(self, key: str, default: Any = None) -> Any: ...
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None: ...
+    def clear(self) -> None: ...
+
+
+backend: CacheBackend = TTLCache(maxsize=RESPONSE_CACHE_MAXSIZE, ttl=RESPONSE_CACHE_TTL)
+
+# Bumped on every change; a body computed across a change is not stored
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def set_backend(new_backend: CacheBackend) -> None:
+    """Replace the storage backend (e.g. with a cache shared by all workers)."""
+    global backend
+    backend = new_backend
+
+
+@events.subscribe
+def invalidate(change: events.ProjectChange = None) -> None:
+    """Drop every cached response; subscribed to project changes."""
+    global _generation
+    with _generation_lock:
+        _generation += 1
+    backend.clear()
+
+
+@lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def _validated_json(model, data: Any) -> bytes:
+    """Validate data against the response model and encode it."""
+    adapter = _adapter(model)
+    data = adapter.validate_python(data, from_attributes=True)
+    if serialization.JSON_DECIMAL_MODE == "string":
+        return adapter.dump_json(data)
+    return serialization.dumps(adapter.dump_python(data))
+
+
+def _key(request: Request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={RESPONSE_CACHE_MAX_AGE}, must-revalidate",
+    }
+
+
+def version_etag(request: Request, version: tuple) -> str:
+    """
+    Strong ETag for a response derived from the data version it was built from.
+
+    Args:
+        request: Current request (path and query string select the representation)
+        version: Data fingerprint, e.g. crud.get_data_version()
+
+    Returns:
+        Quoted ETag value
+    """
+    seed = repr((_key(request), serialization.JSON_DECIMAL_MODE, version)).encode()
+    return '"v' + hashlib.sha256(seed).hexdigest()[:32] + '"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response if the client's If-None-Match already matches etag, else None."""
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_headers(etag))
+    return None
+
+
+def with_validators(response: Response, etag: str) -> Response:
+    """Attach the ETag and revalidation Cache-Control headers to a response."""
+    response.headers.update(_headers(etag))
+    return response
+
+
+async def cached_json(
+    request: Request,
+    model,
+    build: Callable[[], Awaitable[Any]],
+    encode: Optional[Callable[[Any], bytes]] = None,
+    version: Optional[Callable[[], Awaitable[tuple]]] = None
+) -> Response:
+    """
+    Serve a JSON response from the cache, building it on a miss.
+
+    Args:
+        request: Current request (path and query string form the cache key)
+        model: Response model used to validate and serialize the built data
+        build: Coroutine function producing the response data
+        encode: Encoder for data that needs no validation (trusted database
+            rows, see serialization.page_encoder); default validates with model
+        version: Coroutine function returning the data version (see
+            crud.get_data_version). On a cache miss the ETag is derived from
+            it, and a matching If-None-Match is answered before build runs.
+            Default: the ETag is a hash of the body
+
+    Returns:
+        200 response with the body, or 304 if the client's ETag still matches
+    """
+    key = _key(request)
+    entry = backend.get(key) if RESPONSE_CACHE_TTL > 0 else None
+    if entry is None:
+        generation = _generation
+        etag = version_etag(request, await version()) if version else None
+        if etag is not None and (response := not_modified(request, etag)) is not None:
+            return response
+        data = await build()
+        body = encode(data) if encode else _validated_json(model, data)
+        entry = CachedBody(body, etag or '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+        if RESPONSE_CACHE_TTL > 0 and generation == _generation:
+            backend.set(key, entry)
+
+    if (response := not_modified(request, entry.etag)) is not None:
+        return response
+    return Response(content=entry.body, media_type="application/json", headers=_headers(entry.etag))
+
+
+def stats() -> dict:
+    """Backend counters when available (TTLCache)."""
+    return backend.stats() if hasattr(backend, "stats") else {}
@@ -0,0 +1,302 @@
+"""
+Incremental maintenance of the monitor_invest_rollup table.
+Mirrors the aggregation in database/03_view_monitor_invest.sql, but only
+recomputes the id_investasi groups touched by a write instead of the whole
+project_invest table on every read.
+"""
+import enum
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select, delete, insert, update, or_
+from sqlalchemy.orm import Session
+
+from . import events, models
+from .models import MONTHS
+
+# Numeric fields summed over every project sharing an id_investasi
+SUM_FIELDS = (
+    ["kebutuhan_dana", "rkap"]
+    + [f"rkap_{m}" for m in MONTHS]
+    + [f"realisasi_{m}" for m in MONTHS]
+    + [f"prognosa_{m}" for m in MONTHS[:-1]] + ["prognosa_sd_desember"]
+)
+
+# Text fields falling back to the DISTINCT aggregation of the group, with separator
+AGG_TEXT_FIELDS = {
+    "progres_description": "\n---\n",
+    "issue_description": "\n",
+    "action_target": "\n",
+    "head_office_support_desc": "\n",
+    "pic": ", ",
+    "status_issue": ", ",
+}
+
+# Fields copied verbatim from the parent row
+PARENT_FIELDS = [
+    "klaster_regional", "entitas_terminal", "asset_categories", "type_investasi",
+    "tahun_usulan", "project_definition", "status_investasi", "issue_categories",
+    "tahun_rkap", "judul_kontrak", "nilai_kontrak", "penyerapan_sd_tahun_lalu",
+    "penyedia_jasa", "no_kontrak", "tanggal_kontrak", "tgl_mulai_kontrak",
+    "jangka_waktu", "satuan_hari", "tanggal_selesai", "latitude", "longitude",
+    "created_at", "updated_at",
+]
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def is_parent(id_root: str) -> bool:
+    """A parent (induk) project is the '-001' row of its investment group."""
+    return id_root.endswith("-001")
+
+
+def _text(value) -> Optional[str]:
+    """Enum-aware string conversion (status_issue/type_investasi are Enums in the ORM)."""
+    if value is None:
+        return None
+    return value.value if isinstance(value, enum.Enum) else str(value)
+
+
+def build_rollup_rows(members: list[models.ProjectInvest]) -> list[dict]:
+    """
+    Compute rollup rows for one id_investasi group.
+
+    Args:
+        members: Every project sharing one id_investasi (or a single project
+            whose id_investasi is NULL, which is never grouped)
+
+    Returns:
+        One rollup dict per parent project in the group
+    """
+    parents = sorted((p for p in members if is_parent(p.id_root)), key=lambda p: p.id_root)
+    if not parents:
+        return []
+
+    grouped = parents[0].id_investasi is not None
+    pool = members if grouped else []
+
+    sums = {}
+    for field in SUM_FIELDS:
+        values = [getattr(p, field) for p in pool if getattr(p, field) is not None]
+        sums[field] = sum(values, Decimal("0")) if values else Decimal("0")
+
+    running = Decimal("0")
+    for month in MONTHS:
+        running += sums[f"realisasi_{month}"]
+        sums[f"realisasi_sd_{month}"] = running
+
+    # Same definitions as the computed columns of project_invest
+    rkap = sums["rkap"]
+    sums["persen_penyerapan"] = round(running * 100 / rkap, 2) if rkap else None
+    sums["deviasi_rkap"] = running - rkap
+    sums["deviasi_prognosa"] = sums["prognosa_sd_desember"] - rkap
+
+    aggregated = {}
+    for field, separator in AGG_TEXT_FIELDS.items():
+        values = sorted({_text(getattr(p, field)) for p in pool if getattr(p, field) is not None})
+        aggregated[field] = separator.join(values) if values else None
+
+    source_updated_at = max((p.updated_at for p in members if p.updated_at is not None), default=None)
+    now = datetime.utcnow()
+
+    rows = []
+    for parent in parents:
+        row = {field: getattr(parent, field) for field in PARENT_FIELDS}
+        row["type_investasi"] = _text(parent.type_investasi)
+        row.update(sums)
+        for field in AGG_TEXT_FIELDS:
+            own = _text(getattr(parent, field))
+            row[field] = own if own is not None else aggregated[field]
+        row["ref_id_root"] = parent.id_root
+        row["original_id_investasi"] = parent.id_investasi
+        row["source_updated_at"] = source_updated_at
+        row["refreshed_at"] = now
+        rows.append(row)
+    return rows
+
+
+def _upsert(db: Session, rows: list[dict], scope_ids: dict[str, int]) -> None:
+    """
+    Write computed rows, keeping id_virtual stable for parents already present.
+
+    Args:
+        db: Database session
+        rows: Computed rollup rows
+        scope_ids: ref_id_root -> id_virtual of existing rows in the refreshed
+            scope; rows in scope that were not recomputed are deleted
+    """
+    updates, inserts = [], []
+    for row in rows:
+        existing_id = scope_ids.pop(row["ref_id_root"], None)
+        if existing_id is None:
+            inserts.append(row)
+        else:
+            updates.append({**row, "id_virtual": existing_id})
+
+    if scope_ids:
+        db.execute(
+            delete(models.MonitorInvestRollup)
+            .where(models.MonitorInvestRollup.id_virtual.in_(list(scope_ids.values())))
+        )
+    if updates:
+        db.execute(update(models.MonitorInvestRollup), updates)
+    if inserts:
+        db.execute(insert(models.MonitorInvestRollup), inserts)
+
+
+def refresh_groups(
+    db: Session,
+    id_investasi_values: Iterable[Optional[str]],
+    id_roots: Iterable[str] = ()
+) -> None:
+    """
+    Recompute the rollup rows of the given investment groups.
+    Runs inside the caller's transaction; pending changes are flushed first.
+
+    Args:
+        db: Database session
+        id_investasi_values: Investment IDs whose group changed
+        id_roots: Projects written directly (covers parents without id_investasi
+            and parents whose id_investasi just changed)
+    """
+    groups = {g for g in id_investasi_values if g is not None}
+    roots = set(id_roots)
+    if not groups and not roots:
+        return
+    db.flush()
+
+    Project = models.ProjectInvest
+    Rollup = models.MonitorInvestRollup
+
+    conditions = []
+    if groups:
+        conditions.append(Project.id_investasi.in_(groups))
+    if roots:
+        conditions.append(Project.id_root.in_(roots))
+    fetched = db.execute(select(Project).where(or_(*conditions))).scalars().all()
+
+    members_by_group: dict[object, list] = {}
+    for project in fetched:
+        key = project.id_investasi if project.id_investasi is not None else ("root", project.id_root)
+        members_by_group.setdefault(key, []).append(project)
+
+    rows = []
+    for members in members_by_group.values():
+        rows.extend(build_rollup_rows(members))
+
+    scope_conditions = []
+    if groups:
+        scope_conditions.append(Rollup.original_id_investasi.in_(groups))
+    if roots:
+        scope_conditions.append(Rollup.ref_id_root.in_(roots))
+    scope_ids = dict(db.execute(
+        select(Rollup.ref_id_root, Rollup.id_virtual).where(or_(*scope_conditions))
+    ).all())
+
+    _upsert(db, rows, scope_ids)
+
+
+def rebuild_all(db: Session) -> int:
+    """
+    Recompute every rollup row from project_invest and commit.
+    Streams projects ordered by id_investasi and writes in batches, so memory
+    stays bounded by REBUILD_BATCH_SIZE rather than the table size.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of rollup rows written
+    """
+    Project = models.ProjectInvest
+    Rollup = models.MonitorInvestRollup
+
+    scope_ids = dict(db.execute(select(Rollup.ref_id_root, Rollup.id_virtual)).all())
+
+    stream = db.execute(
+        select(Project)
+        .order_by(Project.id_investasi, Project.id_root)
+        .execution_options(yield_per=REBUILD_BATCH_SIZE)
+    ).scalars()
+
+    written = 0
+    pending: list[dict] = []
+
+    def flush_pending() -> None:
+        nonlocal written, pending
+        batch_ids = {
+            row["ref_id_root"]: scope_ids.pop(row["ref_id_root"])
+            for row in pending if row["ref_id_root"] in scope_ids
+        }
+        _upsert(db, pending, batch_ids)
+        written += len(pending)
+        pending = []
+
+    current_key, members = object(), []
+    for project in stream:
+        key = project.id_investasi if project.id_investasi is not None else ("root", project.id_root)
+        if key != current_key:
+            pending.extend(build_rollup_rows(members))
+            current_key, members = key, []
+            if len(pending) >= REBUILD_BATCH_SIZE:
+                flush_pending()
+        members.append(project)
+    pending.extend(build_rollup_rows(members))
+    flush_pending()
+
+    # Parents that no longer exist
+    _upsert(db, [], scope_ids)
+    db.commit()
+    events.publish(events.REBUILD)
+    return written
+
+
+def get_status(db: Session) -> dict:
+    """
+    Report how far the rollup lags behind project_invest.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Dictionary with row counts, refresh timestamps and stale group count
+    """
+    Project = models.ProjectInvest
+    Rollup = models.MonitorInvestRollup
+
+    rollup_rows, last_refreshed_at = db.execute(
+        select(func.count(), func.max(Rollup.refreshed_at))
+    ).one()
+    parent_rows, source_last_updated_at = db.execute(
+        select(
+            func.count().filter(Project.is_parent),
+            func.max(Project.updated_at)
+        )
+    ).one()
+
+    group_updates = (
+        select(Project.id_investasi, func.max(Project.updated_at).label("max_updated_at"))
+        .group_by(Project.id_investasi)
+        .subquery()
+    )
+    stale_groups = db.execute(
+        select(func.count())
+        .select_from(Rollup)
+        .join(group_updates, group_updates.c.id_investasi == Rollup.original_id_investasi)
+        .where(or_(
+            Rollup.source_updated_at.is_(None),
+            group_updates.c.max_updated_at > Rollup.source_updated_at
+        ))
+    ).scalar()
+
+    missing_rows = max(parent_rows - rollup_rows, 0)
+    return {
+        "rollup_rows": rollup_rows,
+        "parent_rows": parent_rows,
+        "missing_rows": missing_rows,
+        "stale_groups": stale_groups,
+        "is_stale": bool(stale_groups or missing_rows or rollup_rows > parent_rows),
+        "last_refreshed_at": last_refreshed_at,
+        "source_last_updated_at": source_last_updated_at,
+    }
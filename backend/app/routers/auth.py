@@ -1,21 +1,34 @@
+import os
+import time
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
-from ..database import get_db
+from .. import security
+from ..cache import TTLCache
+from ..database import get_async_db
 from ..models import User
+from ..security import pwd_context
 
 # JWT Configuration
 SECRET_KEY = "your-secret-key-should-be-in-env"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Principal cache: token -> resolved user, so authenticated requests skip the users lookup.
+# Entries live until the token expires, capped at AUTH_CACHE_MAX_TTL. The cap is the
+# only guarantee that a demoted or removed user loses access: other workers, bulk
+# update(User)/delete(User) and raw SQL do not invalidate this process's cache.
+AUTH_CACHE_MAXSIZE = int(os.getenv("AUTH_CACHE_MAXSIZE", "10000"))
+AUTH_CACHE_MAX_TTL = float(os.getenv("AUTH_CACHE_MAX_TTL", "300"))  # seconds, 0 disables
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 router = APIRouter(
@@ -30,6 +43,38 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     username: str | None = None
 
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user as seen by request handlers (detached from any session)."""
+    id: uuid.UUID
+    username: str
+    role: str
+
+
+principal_cache = TTLCache(maxsize=AUTH_CACHE_MAXSIZE, ttl=AUTH_CACHE_MAX_TTL)
+
+
+def invalidate_user(user_id: uuid.UUID) -> int:
+    """Drop cached principals of a user; returns the number of tokens dropped."""
+    return principal_cache.discard_where(lambda token, principal: principal.id == user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    # Role changes and deletions made through the ORM take effect on the next
+    # request (bulk statements and raw SQL skip these events; see AUTH_CACHE_MAX_TTL)
+    invalidate_user(target.id)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -46,7 +91,11 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: AsyncSession = Depends(get_async_db)):
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -60,28 +109,72 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Se
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await db.scalar(select(User).where(User.username == token_data.username))
     if user is None:
         raise credentials_exception
-    return user
+    principal = Principal(id=user.id, username=user.username, role=user.role)
+    # Never cache past the token's own expiry
+    ttl = AUTH_CACHE_MAX_TTL
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    principal_cache.set(token, principal, ttl=ttl)
+    return principal
+
+async def get_current_active_user(current_user: Annotated[Principal, Depends(get_current_user)]):
+    return current_user
 
-async def get_current_active_user(current_user: Annotated[User, Depends(get_current_user)]):
+async def get_current_admin_user(current_user: Annotated[Principal, Depends(get_current_active_user)]):
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
     return current_user
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    retry_after = security.check_login_rate(form_data.username, security.client_ip(request))
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(max(1, round(retry_after)))},
+        )
+    user = await db.scalar(select(User).where(User.username == form_data.username))
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await security.verify_and_update(form_data.password, user.password_hash)
+        except security.HashingBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Login service busy, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    security.user_login_limiter.reset(form_data.username.lower())
+    if new_hash:
+        # Stored hash used another bcrypt cost; upgrade it transparently
+        user.password_hash = new_hash
+        await db.commit()
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/cache/stats", response_model=CacheStats)
+async def get_principal_cache_stats(
+    current_user: Annotated[Principal, Depends(get_current_admin_user)]
+):
+    """Hit/miss counters of the token -> user cache. Requires admin role."""
+    return principal_cache.stats()
@@ -1,33 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 
-from ..database import get_db
-from .auth import get_current_active_user
+from ..database import get_async_db
+from .. import crud, crud_async, response_cache, schemas, serialization
+from .auth import get_current_active_user, get_current_admin_user
 
 router = APIRouter(
     prefix="/monitor",
     tags=["monitor"]
 )
 
-@router.get("/invest", response_model=List[Dict[str, Any]])
+# Rollup rows are trusted database output: shape them without re-validation
+_encode_page = serialization.page_encoder(schemas.MonitorInvestItem)
+
+
+@router.get("/invest", response_model=schemas.MonitorInvestPage)
 async def get_monitor_invest_data(
-    db: Session = Depends(get_db),
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000, description="Rows per page"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    sort_by: str = Query("ref_id_root", description=f"Sort column: {', '.join(crud.MONITOR_SORT_COLUMNS)}"),
+    sort_dir: Literal["asc", "desc"] = Query("asc", description="Sort direction"),
+    klaster_regional: Optional[List[str]] = Query(None, description="Filter by regional cluster (repeatable)"),
+    tahun_rkap: Optional[List[int]] = Query(None, description="Filter by RKAP year (repeatable)"),
+    status_issue: Optional[List[str]] = Query(None, description="Filter by issue status (repeatable)"),
+    type_investasi: Optional[List[str]] = Query(None, description="Filter by investment type (repeatable)"),
+    entitas_terminal: Optional[List[str]] = Query(None, description="Filter by terminal entity (repeatable)"),
+    q: Optional[str] = Query(None, min_length=1, description="Free-text search"),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_active_user)
 ):
     """
-    Fetch aggregated investment data from view_monitor_invest.
+    Fetch aggregated investment data (view_monitor_invest, served from
+    the incrementally maintained monitor_invest_rollup table).
     Requires authentication.
+
+    Results are keyset-paginated: pass the returned **next_cursor** as
+    **cursor** (with the same sort and filters) to fetch the next page.
+    Pages are cached until the next project change; the ETag follows the
+    data version, so If-None-Match is answered without building the page.
+    """
+    if sort_by not in crud.MONITOR_SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unsupported sort column '{sort_by}'")
+
+    async def build():
+        try:
+            rows, next_cursor = await crud_async.get_monitor_invest(
+                db,
+                limit=limit,
+                cursor=cursor,
+                sort_by=sort_by,
+                sort_dir=sort_dir,
+                klaster_regional=klaster_regional,
+                tahun_rkap=tahun_rkap,
+                status_issue=status_issue,
+                type_investasi=type_investasi,
+                entitas_terminal=entitas_terminal,
+                q=q
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return {"items": rows, "next_cursor": next_cursor, "limit": limit}
+
+    return await response_cache.cached_json(
+        request,
+        schemas.MonitorInvestPage,
+        build,
+        encode=_encode_page,
+        version=lambda: crud_async.get_data_version(db, include_rollup=True)
+    )
+
+
+@router.get("/invest/rollup", response_model=schemas.RollupStatusResponse)
+async def get_rollup_status(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Report rollup freshness: row counts, last refresh time and how many
+    investment groups changed since their rollup row was computed.
+    Requires admin role.
+    """
+    return await crud_async.get_rollup_status(db)
+
+
+@router.post("/invest/rollup/rebuild", response_model=schemas.RollupRebuildResponse)
+async def rebuild_rollup(
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_admin_user)
+):
+    """
+    Recompute the whole monitor rollup from project_invest.
+    Use after writes that bypassed the API (e.g. SQL imports).
+    Requires admin role.
     """
-    try:
-        # Query the view directly using raw SQL or map it to a model
-        # using raw SQL for simplicity with Views
-        result = db.execute(text("SELECT * FROM view_monitor_invest ORDER BY id_virtual"))
-        
-        # Convert result to list of dicts
-        columns = result.keys()
-        data = [dict(zip(columns, row)) for row in result]
-        return data
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    rebuilt_rows = await crud_async.rebuild_rollup(db)
+    return {**await crud_async.get_rollup_status(db), "rebuilt_rows": rebuilt_rows}
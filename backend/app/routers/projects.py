@@ -2,31 +2,44 @@
 API endpoints for project investment management.
 Provides RESTful CRUD operations for projects.
 """
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from .. import crud, schemas
+from ..database import get_async_db, get_db, SessionLocal
+from .. import autocomplete, crud, crud_async, exporter, feed, importer, projection, response_cache, schemas, sync
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 
 @router.get("/filter-options", response_model=schemas.FilterOptionsResponse)
-def get_filter_options(db: Session = Depends(get_db)):
+async def get_filter_options(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Get available filter options from project_invest table.
+    Cached until the next project change; supports If-None-Match.
     """
-    return crud.get_filter_options(db)
+    return await response_cache.cached_json(
+        request,
+        schemas.FilterOptionsResponse,
+        lambda: crud_async.get_filter_options(db)
+    )
 
-@router.get("", response_model=schemas.ProjectListResponse)
-def list_projects(
+@router.get("", response_model=Union[schemas.ProjectListResponse, schemas.ProjectCursorPage])
+async def list_projects(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Items per page in cursor mode"),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor of a previous page (cursor mode)"),
+    count: Literal["exact", "estimate", "none"] = Query("none", description="Total to compute in cursor mode"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    layout: Literal["objects", "columnar"] = Query("objects", alias="format", description="objects, or columnar (columns + rows as arrays)"),
     klaster_regional: Optional[str] = Query(None, description="Filter by regional cluster"),
     tahun_rkap: Optional[int] = Query(None, description="Filter by RKAP year"),
     status_issue: Optional[str] = Query(None, description="Filter by issue status"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get paginated list of projects with optional filters.
@@ -36,75 +49,384 @@ def list_projects(
     - **klaster_regional**: Filter by regional cluster
     - **tahun_rkap**: Filter by RKAP year
     - **status_issue**: Filter by issue status (Open/Closed)
+    
+    Passing **limit** and/or **cursor** switches to cursor mode: keyset pages
+    ordered newest first (max 1000 items) with opaque **next_cursor** /
+    **prev_cursor** and no total unless **count** is "exact" or "estimate".
+    Deep pages cost the same as the first one.
+    
+    **fields** (e.g. `id_root,project_definition,rkap`) limits both the
+    columns read and the keys returned; **format=columnar** replaces `items`
+    with `columns` (names, once) and `rows` (one array per project).
+    
+    The ETag follows the data version (newest update and deletion), so a
+    matching If-None-Match is answered with 304 before the page is queried.
     """
+    try:
+        selected = projection.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    etag = response_cache.version_etag(request, await crud_async.get_data_version(db))
+    if (response := response_cache.not_modified(request, etag)) is not None:
+        return response
+    columns = projection.load_columns(selected) if selected else None
+    
+    if limit is not None or cursor is not None:
+        limit = limit or page_size
+        try:
+            result = await crud_async.get_projects_keyset(
+                db,
+                limit=limit,
+                cursor=cursor,
+                klaster_regional=klaster_regional,
+                tahun_rkap=tahun_rkap,
+                status_issue=status_issue,
+                count=count,
+                columns=columns
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        items = result.pop("items")
+        return response_cache.with_validators(Response(
+            content=projection.render(items, selected, layout, limit=limit, **result),
+            media_type="application/json"
+        ), etag)
+    
     skip = (page - 1) * page_size
-    projects, total = crud.get_projects(
+    projects, total = await crud_async.get_projects(
         db,
         skip=skip,
         limit=page_size,
         klaster_regional=klaster_regional,
         tahun_rkap=tahun_rkap,
-        status_issue=status_issue
+        status_issue=status_issue,
+        columns=columns
+    )
+    
+    return response_cache.with_validators(Response(
+        content=projection.render(projects, selected, layout, total=total, page=page, page_size=page_size),
+        media_type="application/json"
+    ), etag)
+
+
+@router.get("/search", response_model=schemas.ProjectSearchResponse)
+async def search_projects(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200, description="Search text"),
+    limit: int = Query(20, ge=1, le=100, description="Hits per page"),
+    offset: int = Query(0, ge=0, le=10000, description="Hits to skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    klaster_regional: Optional[str] = Query(None, description="Filter by regional cluster"),
+    tahun_rkap: Optional[int] = Query(None, description="Filter by RKAP year"),
+    status_issue: Optional[str] = Query(None, description="Filter by issue status"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over project definition, progress and issue descriptions,
+    contract title and contractor, most relevant first.
+    
+    - **q**: Words (all required), "quoted phrases", `or` between
+      alternatives and `-word` to exclude
+    - **klaster_regional**, **tahun_rkap**, **status_issue**: Same filters as
+      GET /projects
+    
+    Each item carries **rank** and a **snippet** (HTML-escaped, matches wrapped
+    in `<mark>`). **fields** limits the project fields returned.
+    """
+    try:
+        selected = projection.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    etag = response_cache.version_etag(request, await crud_async.get_data_version(db))
+    if (response := response_cache.not_modified(request, etag)) is not None:
+        return response
+    result = await crud_async.search_projects(
+        db,
+        q,
+        limit=limit,
+        offset=offset,
+        klaster_regional=klaster_regional,
+        tahun_rkap=tahun_rkap,
+        status_issue=status_issue,
+        columns=projection.load_columns(selected) if selected else None
+    )
+    return response_cache.with_validators(Response(
+        content=projection.render_hits(
+            result["hits"], selected, query=q, total=result["total"], limit=limit, offset=offset
+        ),
+        media_type="application/json"
+    ), etag)
+
+@router.get("/autocomplete", response_model=schemas.AutocompleteResponse)
+async def autocomplete_values(
+    field: Literal[autocomplete.AUTOCOMPLETE_FIELDS] = Query(..., description="Field to suggest values for"),
+    q: str = Query("", max_length=100, description="Typed text (empty: most frequent values)"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Suggest values of a field for typeahead inputs, with the number of
+    projects carrying each value.
+    
+    Served from an in-memory index: values starting with the text rank
+    before values with a word starting with it, then values containing it;
+    ties go to the more frequent value. The database is only read to pick
+    up projects changed since the previous lookup.
+    """
+    if not autocomplete.AUTOCOMPLETE_ENABLED:
+        raise HTTPException(status_code=404, detail="Autocomplete is disabled")
+    if autocomplete.needs_sync():
+        await crud_async.sync_autocomplete(db)
+    return {"field": field, "query": q, **autocomplete.suggest(field, q, limit)}
+
+
+@router.get("/sync", response_model=schemas.ProjectSyncResponse)
+async def sync_projects(
+    since: Optional[str] = Query(None, description="Watermark of the previous sync (omit for a full copy)"),
+    limit: int = Query(1000, ge=1, le=5000, description="Maximum changed projects (and tombstones) per response"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Incremental sync for clients keeping a local copy of the projects.
+    
+    Returns the projects created or updated after **since** (oldest change
+    first), the id_roots deleted after it, and the **watermark** to pass as
+    **since** next time; while **has_more** is true, call again right away.
+    Without **since** every project is returned. Upsert `items` and remove
+    `deleted` by id_root: changes of the last few seconds are sent again on
+    the next sync, and unknown deleted ids are to be ignored.
+    
+    A watermark older than the tombstone retention (SYNC_TOMBSTONE_DAYS) is
+    answered with 410; discard the local copy and sync without **since**.
+    """
+    try:
+        selected = projection.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        result = await crud_async.get_project_changes(
+            db,
+            since=since,
+            limit=limit,
+            columns=projection.load_columns(selected) if selected else None
+        )
+    except sync.WatermarkExpiredError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = result.pop("items")
+    return Response(
+        content=projection.render(items, selected, **result),
+        media_type="application/json"
     )
+
+
+@router.get("/feed", response_class=StreamingResponse)
+async def change_feed(request: Request):
+    """
+    Live change notifications as server-sent events (use with EventSource).
     
-    return schemas.ProjectListResponse(
-        total=total,
-        items=projects,
-        page=page,
-        page_size=page_size
+    Each committed write sends a `change` event whose data holds the
+    **action** (create, update, delete, import, rebuild), the **id_roots**
+    written, the **fields** written (empty: whole rows) and the
+    **id_investasi** groups whose monitor rows changed. A `resync` event
+    means changes were missed: refetch everything. Reconnecting clients
+    send Last-Event-ID (EventSource does) and get the events they missed.
+    """
+    if not feed.FEED_ENABLED:
+        raise HTTPException(status_code=404, detail="Change feed is disabled")
+    return StreamingResponse(
+        feed.broker.stream(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
 @router.get("/stats", response_model=dict)
-def get_statistics(
+async def get_statistics(
+    request: Request,
     tahun_rkap: Optional[int] = Query(None, description="Filter by RKAP year"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get summary statistics for dashboard.
     
     Returns total projects, total RKAP, total contract value, and open issues count.
+    For grouped or monthly figures use **/projects/stats/aggregate**.
+    Cached until the next project change; supports If-None-Match.
     """
-    return crud.get_summary_stats(db, tahun_rkap)
+    return await response_cache.cached_json(
+        request,
+        dict,
+        lambda: crud_async.get_summary_stats(db, tahun_rkap)
+    )
 
 
+@router.get("/stats/aggregate", response_model=schemas.AggregateStatsResponse)
+async def get_aggregate_statistics(
+    group_by: Optional[List[str]] = Query(
+        None,
+        description=f"Group by dimension (repeatable): {', '.join(crud.AGGREGATE_GROUP_COLUMNS)}"
+    ),
+    tahun_rkap: Optional[int] = Query(None, description="Filter by RKAP year"),
+    klaster_regional: Optional[str] = Query(None, description="Filter by regional cluster"),
+    status_issue: Optional[str] = Query(None, description="Filter by issue status"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get dashboard aggregates in one round trip.
+    
+    Returns counts, RKAP, contract value, realization and prognosis totals
+    (yearly and per month) for every combination of the **group_by**
+    dimensions, plus overall totals.
+    """
+    try:
+        return await crud_async.get_aggregate_stats(
+            db,
+            group_by=group_by,
+            tahun_rkap=tahun_rkap,
+            klaster_regional=klaster_regional,
+            status_issue=status_issue
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
+def _year_month(value: str) -> tuple[int, int]:
+    year, month = value.split("-")
+    return int(year), int(month)
+
+
+@router.get("/stats/monthly", response_model=schemas.MonthlySeriesResponse)
+async def get_monthly_statistics(
+    request: Request,
+    start: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="First month (YYYY-MM)"),
+    end: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Last month (YYYY-MM), inclusive"),
+    klaster_regional: Optional[str] = Query(None, description="Filter by regional cluster"),
+    entitas_terminal: Optional[str] = Query(None, description="Filter by terminal entity"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get RKAP, realization and prognosis totals per month for a month range.
+    
+    Served from the monthly fact table, so ranges may span several years
+    (up to 120 months). Prognosis figures are cumulative.
+    """
+    async def build():
+        try:
+            return await crud_async.get_monthly_series(
+                db,
+                start=_year_month(start),
+                end=_year_month(end),
+                klaster_regional=klaster_regional,
+                entitas_terminal=entitas_terminal
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    return await response_cache.cached_json(request, schemas.MonthlySeriesResponse, build)
+
+
+@router.get("/stats/yoy", response_model=schemas.YearOverYearResponse)
+async def get_year_over_year_statistics(
+    request: Request,
+    tahun: int = Query(..., ge=1900, le=9999, description="Year to compare with the previous year"),
+    until_bulan: int = Query(12, ge=1, le=12, description="Last month included (year to date)"),
+    klaster_regional: Optional[str] = Query(None, description="Filter by regional cluster"),
+    entitas_terminal: Optional[str] = Query(None, description="Filter by terminal entity"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Compare RKAP, realization and prognosis with the previous year,
+    month by month and year to date.
+    """
+    return await response_cache.cached_json(
+        request,
+        schemas.YearOverYearResponse,
+        lambda: crud_async.get_year_over_year(
+            db,
+            tahun=tahun,
+            until_bulan=until_bulan,
+            klaster_regional=klaster_regional,
+            entitas_terminal=entitas_terminal
+        )
+    )
+
+
+@router.get("/export")
+def export_projects(
+    source: Literal["projects", "monitor"] = Query("projects", description="projects = project_invest rows, monitor = aggregated monitor rows"),
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv", description="Output format"),
+    klaster_regional: Optional[str] = Query(None, description="Filter by regional cluster"),
+    tahun_rkap: Optional[int] = Query(None, description="Filter by RKAP year"),
+    status_issue: Optional[str] = Query(None, description="Filter by issue status"),
+):
+    """
+    Stream every matching row as CSV, NDJSON or Parquet.
+    
+    Rows are read with a server-side cursor and written batch by batch, so
+    the export size is not limited by memory or page size.
+    """
+    try:
+        exporter.check_format(format)
+    except exporter.ExportFormatUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    
+    media_type, extension = exporter.FORMATS[format]
+    return StreamingResponse(
+        exporter.stream_export(
+            SessionLocal,
+            source,
+            format,
+            klaster_regional=klaster_regional,
+            tahun_rkap=tahun_rkap,
+            status_issue=status_issue
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{source}_export.{extension}"'}
+    )
+
 
 @router.get("/invest-projects/{id_investasi:path}", response_model=list[schemas.ProjectResponse])
-def get_projects_by_investment_id(
+async def get_projects_by_investment_id(
+    request: Request,
     id_investasi: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all projects by Investment ID.
+    Cached until the next project change; supports If-None-Match.
     
     - **id_investasi**: Investment ID
     """
-    projects = crud.get_projects_by_investasi_id_list(db, id_investasi)
-    return projects
+    return await response_cache.cached_json(
+        request,
+        list[schemas.ProjectResponse],
+        lambda: crud_async.get_projects_by_investasi_id_list(db, id_investasi)
+    )
 
 
 @router.get("/{id_root:path}", response_model=schemas.ProjectResponse)
-def get_project(
+async def get_project(
     id_root: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a single project by ID.
     
     - **id_root**: Project UUID
     """
-    project = crud.get_project(db, id_root)
+    project = await crud_async.get_project(db, id_root)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
 
 
 @router.post("", response_model=schemas.ProjectResponse, status_code=201)
-def create_project(
+async def create_project(
     project: schemas.ProjectCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new project.
@@ -113,39 +435,79 @@ def create_project(
     - **id_investasi**: Unique investment ID
     - **project_definition**: Project description
     """
-    # Check if id_investasi already exists
-    existing = crud.get_project_by_investasi_id(db, project.id_investasi)
-    if existing:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Project with id_investasi '{project.id_investasi}' already exists"
-        )
+    try:
+        return await crud_async.create_project(db, project)
+    except crud.ProjectExistsError as e:
+        # Taken id_investasi keeps its historical 400
+        raise HTTPException(status_code=409 if e.field == "id_root" else 400, detail=str(e))
+
+
+@router.post("/import", response_model=schemas.ImportReport)
+def import_projects(
+    file: UploadFile = File(..., description="CSV or XLSX file whose header row uses project field names"),
+    chunk_size: int = Query(importer.DEFAULT_CHUNK_SIZE, ge=1, le=10000, description="Rows per transaction"),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk import (upsert by **id_root**) projects from a CSV or XLSX file.
+    
+    Rows are validated like **POST /projects** and written in chunked
+    transactions. Existing projects only get the cells filled in their row;
+    blank cells and columns missing from the file keep the stored values.
+    Returns counts plus per-row errors (line numbers refer to the file).
+    """
+    try:
+        return importer.import_projects(db, file.file, file.filename, chunk_size=chunk_size)
+    except importer.UnsupportedImportFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+
+@router.patch("/batch", response_model=schemas.ProjectBatchUpdateResponse)
+async def batch_update_projects(
+    batch: schemas.ProjectBatchUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update progress and/or issue fields of many projects in one transaction.
     
-    return crud.create_project(db, project)
+    Each item carries an **id_root** with a **progress** (as in
+    PATCH /projects/{id}/progress) and/or **issue** (as in
+    PATCH /projects/{id}/issue) payload. Unknown projects are reported as
+    `not_found`, and items whose **expected_updated_at** no longer matches
+    as `conflict`, without failing the rest of the batch; the updated rows
+    are not returned (fetch them again if needed).
+    """
+    results = await crud_async.batch_update_projects(db, batch.items)
+    counts = {status: sum(1 for r in results if r["status"] == status)
+              for status in ("updated", "unchanged", "not_found", "conflict")}
+    return schemas.ProjectBatchUpdateResponse(**counts, results=results)
 
 
 @router.put("/{id_root:path}", response_model=schemas.ProjectResponse)
-def update_project(
+async def update_project(
     id_root: str,
     project: schemas.ProjectUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Full update of a project.
     
     - **id_root**: Project UUID
     """
-    updated = crud.update_project(db, id_root, project)
+    try:
+        updated = await crud_async.update_project(db, id_root, project)
+    except crud.StaleUpdateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Project not found")
     return updated
 
 
 @router.patch("/{id_root:path}/progress", response_model=schemas.ProjectResponse)
-def update_project_progress(
+async def update_project_progress(
     id_root: str,
     progress: schemas.ProjectProgressUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update project progress fields.
@@ -157,17 +519,20 @@ def update_project_progress(
     - status_investasi
     - Monthly realization values
     """
-    updated = crud.update_project_progress(db, id_root, progress)
+    try:
+        updated = await crud_async.update_project_progress(db, id_root, progress)
+    except crud.StaleUpdateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Project not found")
     return updated
 
 
 @router.patch("/{id_root:path}/issue", response_model=schemas.ProjectResponse)
-def update_project_issue(
+async def update_project_issue(
     id_root: str,
     issue: schemas.ProjectIssueUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update project issue fields.
@@ -181,23 +546,26 @@ def update_project_issue(
     - head_office_support_desc
     - status_issue
     """
-    updated = crud.update_project_issue(db, id_root, issue)
+    try:
+        updated = await crud_async.update_project_issue(db, id_root, issue)
+    except crud.StaleUpdateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not updated:
         raise HTTPException(status_code=404, detail="Project not found")
     return updated
 
 
 @router.delete("/{id_root:path}", status_code=204)
-def delete_project(
+async def delete_project(
     id_root: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a project.
     
     - **id_root**: Project UUID
     """
-    deleted = crud.delete_project(db, id_root)
+    deleted = await crud_async.delete_project(db, id_root)
     if not deleted:
         raise HTTPException(status_code=404, detail="Project not found")
     return None
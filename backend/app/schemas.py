@@ -4,7 +4,7 @@ Provides type safety and automatic documentation for API endpoints.
 """
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Literal, Optional
 from enum import Enum
 
 from pydantic import BaseModel, Field
@@ -118,12 +118,20 @@ class ProjectCreate(ProjectBase):
     project_definition: str = Field(..., description="Project definition/description")
 
 
-class ProjectUpdate(ProjectBase):
+class ConcurrencyCheck(BaseModel):
+    """Optimistic concurrency token accepted by the update schemas."""
+    expected_updated_at: Optional[datetime] = Field(
+        default=None,
+        description="updated_at as last read; the update fails with 409 if the project changed since"
+    )
+
+
+class ProjectUpdate(ProjectBase, ConcurrencyCheck):
     """Schema for full project update."""
     pass
 
 
-class ProjectProgressUpdate(BaseModel):
+class ProjectProgressUpdate(ConcurrencyCheck):
     """Schema for updating project progress only."""
     progres_description: Optional[str] = None
     status_investasi: Optional[str] = Field(default=None, max_length=100)
@@ -143,7 +151,7 @@ class ProjectProgressUpdate(BaseModel):
     realisasi_desember: Optional[Decimal] = None
 
 
-class ProjectIssueUpdate(BaseModel):
+class ProjectIssueUpdate(ConcurrencyCheck):
     """Schema for updating project issues."""
     issue_categories: Optional[str] = Field(default=None, max_length=255)
     issue_description: Optional[str] = None
@@ -152,9 +160,44 @@ class ProjectIssueUpdate(BaseModel):
     status_issue: Optional[StatusIssue] = None
 
 
+class ProjectBatchItem(ConcurrencyCheck):
+    """One project of a batch update: progress and/or issue fields for id_root."""
+    id_root: str
+    progress: Optional[ProjectProgressUpdate] = None
+    issue: Optional[ProjectIssueUpdate] = None
+
+
+class ProjectBatchUpdate(BaseModel):
+    """Schema for batch progress/issue updates (applied in one transaction)."""
+    items: list[ProjectBatchItem] = Field(min_length=1, max_length=1000)
+
+
+class ProjectBatchItemResult(BaseModel):
+    """Outcome of one batch item."""
+    id_root: str
+    status: Literal["updated", "unchanged", "not_found", "conflict"]
+    updated_at: Optional[datetime] = None
+
+
+class ProjectBatchUpdateResponse(BaseModel):
+    """Schema for the result of a batch update."""
+    updated: int
+    unchanged: int
+    not_found: int
+    conflict: int = Field(description="Items skipped because expected_updated_at no longer matched")
+    results: list[ProjectBatchItemResult]
+
+
 class ProjectResponse(ProjectBase):
     """Schema for project response with all fields."""
     id_root: str
+    
+    # Derived (computed by the database, read-only)
+    realisasi_sd_desember: Optional[Decimal] = Field(default=None, description="Realization January..December")
+    persen_penyerapan: Optional[Decimal] = Field(default=None, description="Realization as % of RKAP")
+    deviasi_rkap: Optional[Decimal] = Field(default=None, description="Realization minus RKAP")
+    deviasi_prognosa: Optional[Decimal] = Field(default=None, description="Prognosis (s.d. Desember) minus RKAP")
+    
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -170,8 +213,284 @@ class ProjectListResponse(BaseModel):
     page_size: int
 
 
+class ProjectCursorPage(BaseModel):
+    """Schema for one keyset page of projects (cursor mode of GET /projects)."""
+    items: list[ProjectResponse]
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next (older) page; null on the last page")
+    prev_cursor: Optional[str] = Field(default=None, description="Cursor for the previous (newer) page; null on the first page")
+    limit: int
+    total: Optional[int] = Field(default=None, description="Matching rows; null unless requested with count")
+    total_estimated: bool = False
+
+
+class ProjectSearchHit(ProjectResponse):
+    """Schema for one full-text search hit."""
+    rank: float = Field(description="Relevance; higher ranks first")
+    snippet: Optional[str] = Field(default=None, description="HTML-escaped excerpt with matches in <mark> tags")
+
+
+class ProjectSearchResponse(BaseModel):
+    """Schema for GET /projects/search."""
+    query: str
+    total: int
+    limit: int
+    offset: int
+    items: list[ProjectSearchHit]
+
+
+class ProjectTombstone(BaseModel):
+    """A deleted project, as reported by GET /projects/sync."""
+    id_root: str
+    id_investasi: Optional[str] = None
+    deleted_at: datetime
+
+
+class ProjectSyncResponse(BaseModel):
+    """Schema for GET /projects/sync."""
+    items: list[ProjectResponse] = Field(description="Projects created or updated after the watermark")
+    deleted: list[ProjectTombstone] = Field(description="Projects deleted after the watermark")
+    watermark: str = Field(description="Pass as `since` on the next sync")
+    has_more: bool = Field(description="More changes are pending; sync again right away")
+
+
+class AutocompleteItem(BaseModel):
+    """One suggested value and the number of projects carrying it."""
+    value: str
+    count: int
+
+
+class AutocompleteResponse(BaseModel):
+    """Schema for GET /projects/autocomplete."""
+    field: str
+    query: str
+    matched: int
+    items: list[AutocompleteItem]
+
+
 class FilterOptionsResponse(BaseModel):
     """Schema for filter options response."""
     tgl_mulai_options: list[date]
     tgl_selesai_options: list[date]
     kontrak_aktif_options: list[Optional[str]]
+
+class MonitorInvestItem(BaseModel):
+    """
+    Schema for one aggregated row of view_monitor_invest (served from its rollup table).
+    Monetary values are floats so the JSON payload keeps emitting numbers,
+    matching what the frontend has always received from this endpoint.
+    """
+    # Identity
+    id_virtual: Optional[int] = None
+    ref_id_root: str
+    original_id_investasi: Optional[str] = None
+    
+    # Attributes
+    klaster_regional: Optional[str] = None
+    entitas_terminal: Optional[str] = None
+    asset_categories: Optional[str] = None
+    type_investasi: Optional[str] = None
+    tahun_usulan: Optional[int] = None
+    project_definition: Optional[str] = None
+    status_investasi: Optional[str] = None
+    
+    # Aggregated descriptions
+    progres_description: Optional[str] = None
+    issue_description: Optional[str] = None
+    action_target: Optional[str] = None
+    issue_categories: Optional[str] = None
+    head_office_support_desc: Optional[str] = None
+    pic: Optional[str] = None
+    status_issue: Optional[str] = None
+    
+    # RKAP
+    tahun_rkap: Optional[int] = None
+    kebutuhan_dana: float = 0
+    rkap: float = 0
+    rkap_januari: float = 0
+    rkap_februari: float = 0
+    rkap_maret: float = 0
+    rkap_april: float = 0
+    rkap_mei: float = 0
+    rkap_juni: float = 0
+    rkap_juli: float = 0
+    rkap_agustus: float = 0
+    rkap_september: float = 0
+    rkap_oktober: float = 0
+    rkap_november: float = 0
+    rkap_desember: float = 0
+    
+    # Realization
+    realisasi_januari: float = 0
+    realisasi_februari: float = 0
+    realisasi_maret: float = 0
+    realisasi_april: float = 0
+    realisasi_mei: float = 0
+    realisasi_juni: float = 0
+    realisasi_juli: float = 0
+    realisasi_agustus: float = 0
+    realisasi_september: float = 0
+    realisasi_oktober: float = 0
+    realisasi_november: float = 0
+    realisasi_desember: float = 0
+    
+    # Cumulative realization (S.D. = Sampai Dengan)
+    realisasi_sd_januari: float = 0
+    realisasi_sd_februari: float = 0
+    realisasi_sd_maret: float = 0
+    realisasi_sd_april: float = 0
+    realisasi_sd_mei: float = 0
+    realisasi_sd_juni: float = 0
+    realisasi_sd_juli: float = 0
+    realisasi_sd_agustus: float = 0
+    realisasi_sd_september: float = 0
+    realisasi_sd_oktober: float = 0
+    realisasi_sd_november: float = 0
+    realisasi_sd_desember: float = 0
+    
+    # Prognosis
+    prognosa_januari: float = 0
+    prognosa_februari: float = 0
+    prognosa_maret: float = 0
+    prognosa_april: float = 0
+    prognosa_mei: float = 0
+    prognosa_juni: float = 0
+    prognosa_juli: float = 0
+    prognosa_agustus: float = 0
+    prognosa_september: float = 0
+    prognosa_oktober: float = 0
+    prognosa_november: float = 0
+    prognosa_sd_desember: float = 0
+    
+    # Absorption vs RKAP
+    persen_penyerapan: Optional[float] = None
+    deviasi_rkap: Optional[float] = None
+    deviasi_prognosa: Optional[float] = None
+    
+    # Contract
+    judul_kontrak: Optional[str] = None
+    nilai_kontrak: Optional[float] = None
+    penyerapan_sd_tahun_lalu: Optional[float] = None
+    penyedia_jasa: Optional[str] = None
+    no_kontrak: Optional[str] = None
+    tanggal_kontrak: Optional[date] = None
+    tgl_mulai_kontrak: Optional[date] = None
+    jangka_waktu: Optional[int] = None
+    satuan_hari: Optional[str] = None
+    tanggal_selesai: Optional[date] = None
+    
+    # Location
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    
+    # Timestamps
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class MonitorInvestPage(BaseModel):
+    """Schema for one keyset page of monitor rows."""
+    items: list[MonitorInvestItem]
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page; null on the last page")
+    limit: int
+
+
+class RollupStatusResponse(BaseModel):
+    """Schema for monitor rollup freshness report."""
+    rollup_rows: int
+    parent_rows: int
+    missing_rows: int
+    stale_groups: int
+    is_stale: bool
+    last_refreshed_at: Optional[datetime] = None
+    source_last_updated_at: Optional[datetime] = None
+
+
+class RollupRebuildResponse(RollupStatusResponse):
+    """Schema for the result of a full rollup rebuild."""
+    rebuilt_rows: int
+
+
+class AggregateBucket(BaseModel):
+    """Schema for the aggregated figures of one group combination."""
+    group: dict[str, Optional[str]] = Field(default_factory=dict, description="Values of the group_by dimensions")
+    total_projects: int
+    open_issues: int
+    total_kebutuhan_dana: float
+    total_rkap: float
+    total_nilai_kontrak: float
+    total_realisasi: float
+    total_prognosa: float
+    rkap_bulanan: list[float] = Field(description="RKAP per month, January..December")
+    realisasi_bulanan: list[float] = Field(description="Realization per month, January..December")
+    prognosa_bulanan: list[float] = Field(description="Cumulative prognosis per month, January..December")
+
+
+class AggregateStatsResponse(BaseModel):
+    """Schema for grouped dashboard aggregates."""
+    group_by: list[str]
+    buckets: list[AggregateBucket]
+    totals: AggregateBucket
+
+
+class MonthlyFigures(BaseModel):
+    """Schema for the totals of one month (prognosa is cumulative)."""
+    rkap: float
+    realisasi: float
+    prognosa: float
+
+
+class MonthlyPoint(MonthlyFigures):
+    """Schema for one month of a monthly series."""
+    tahun: int
+    bulan: int
+
+
+class MonthlySeriesResponse(BaseModel):
+    """Schema for monthly totals over a month range (start/end as YYYY-MM)."""
+    start: str
+    end: str
+    points: list[MonthlyPoint]
+
+
+class YearOverYearMonth(BaseModel):
+    """Schema for one month of a year-over-year comparison."""
+    bulan: int
+    current: MonthlyFigures
+    previous: MonthlyFigures
+
+
+class YearOverYearResponse(BaseModel):
+    """Schema for a year-to-date comparison with the previous year."""
+    tahun: int
+    previous_tahun: int
+    until_bulan: int
+    months: list[YearOverYearMonth]
+    total_current: MonthlyFigures
+    total_previous: MonthlyFigures
+    growth_pct: dict[str, Optional[float]]
+
+
+class ImportFieldError(BaseModel):
+    """Schema for one validation/database error of an imported row."""
+    field: Optional[str] = None
+    message: str
+
+
+class ImportRowError(BaseModel):
+    """Schema for the errors of one rejected row (row = line number in the file)."""
+    row: Optional[int] = None
+    id_root: Optional[str] = None
+    errors: list[ImportFieldError]
+
+
+class ImportReport(BaseModel):
+    """Schema for the result of a bulk project import."""
+    total_rows: int
+    imported: int
+    duplicates: int = Field(description="Rows superseded by a later row with the same id_root in the same chunk")
+    failed: int
+    errors: list[ImportRowError]
+    errors_truncated: bool
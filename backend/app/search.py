@@ -0,0 +1,296 @@
+"""
+Full-text search over the narrative fields of project_invest.
+
+PostgreSQL: a stored generated tsvector column (`search_vector`, weighted per
+field) with a GIN index, queried with websearch_to_tsquery and ranked with
+ts_rank_cd; snippets come from ts_headline on the page rows only.
+
+SQLite: an external-content FTS5 table (`project_invest_fts`) kept in sync by
+triggers on project_invest, ranked with bm25 and highlighted with snippet().
+
+Both are created at startup by `install`; writes keep them current without
+application code (generated column / triggers). Queries accept the web-search
+syntax on both backends: words (all required), "quoted phrases", `or` and
+-excluded words.
+"""
+import html
+import os
+import re
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import models
+from .crud import _load_only, _project_filters
+
+# PostgreSQL text search configuration: 'simple' (no stemming, suits the mix of
+# Indonesian, English and names) or e.g. 'indonesian' for stemming
+SEARCH_TEXT_CONFIG = os.getenv("SEARCH_TEXT_CONFIG", "simple")
+
+# Searched columns and their weight class (A ranks highest)
+SEARCH_FIELDS = {
+    "project_definition": "A",
+    "id_investasi": "A",
+    "judul_kontrak": "B",
+    "penyedia_jasa": "B",
+    "entitas_terminal": "B",
+    "issue_description": "C",
+    "progres_description": "C",
+}
+# bm25 column weights on SQLite, matching PostgreSQL's default A/B/C weights
+_BM25_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2}
+
+FTS_TABLE = "project_invest_fts"
+VECTOR_COLUMN = "search_vector"
+GIN_INDEX = "idx_project_invest_search"
+
+# Highlight markers used inside SQL, turned into <mark> after HTML-escaping
+_START, _STOP = "\x02", "\x03"
+SNIPPET_WORDS = 12
+
+_TERM = re.compile(r'(-?)"([^"]*)"|(-?)(\S+)')
+
+
+def _config() -> str:
+    if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", SEARCH_TEXT_CONFIG):
+        raise ValueError(f"Invalid SEARCH_TEXT_CONFIG: {SEARCH_TEXT_CONFIG!r}")
+    return SEARCH_TEXT_CONFIG
+
+
+def _vector_sql(config: str) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('{config}'::regconfig, coalesce({name}, '')), '{weight}')"
+        for name, weight in SEARCH_FIELDS.items()
+    )
+
+
+def _fingerprint(config: str) -> str:
+    """Identifies the indexed configuration; a change triggers a rebuild."""
+    return f"{config}:" + ",".join(f"{name}={weight}" for name, weight in SEARCH_FIELDS.items())
+
+
+def _install_postgresql(conn) -> bool:
+    config = _config()
+    current = conn.exec_driver_sql(
+        "SELECT coalesce(col_description(attrelid, attnum), '') FROM pg_attribute "
+        f"WHERE attrelid = 'project_invest'::regclass AND attname = '{VECTOR_COLUMN}' AND NOT attisdropped"
+    ).scalar()
+    if current == _fingerprint(config):
+        conn.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON project_invest USING GIN ({VECTOR_COLUMN})"
+        )
+        return False
+    if current is not None:
+        # Configuration or field set changed: recompute every vector
+        conn.exec_driver_sql(f"ALTER TABLE project_invest DROP COLUMN {VECTOR_COLUMN}")
+    conn.exec_driver_sql(
+        f"ALTER TABLE project_invest ADD COLUMN {VECTOR_COLUMN} tsvector "
+        f"GENERATED ALWAYS AS ({_vector_sql(config)}) STORED"
+    )
+    conn.exec_driver_sql(f"COMMENT ON COLUMN project_invest.{VECTOR_COLUMN} IS '{_fingerprint(config)}'")
+    conn.exec_driver_sql(f"CREATE INDEX {GIN_INDEX} ON project_invest USING GIN ({VECTOR_COLUMN})")
+    return True
+
+
+def _install_sqlite(conn) -> bool:
+    names = ", ".join(SEARCH_FIELDS)
+    new_values = ", ".join(f"new.{name}" for name in SEARCH_FIELDS)
+    old_values = ", ".join(f"old.{name}" for name in SEARCH_FIELDS)
+    existing = set(conn.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE name LIKE 'project_invest_fts%'"
+    ).scalars())
+    triggers = {f"{FTS_TABLE}_ai", f"{FTS_TABLE}_ad", f"{FTS_TABLE}_au"}
+    if FTS_TABLE in existing:
+        indexed = [row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({FTS_TABLE})")]
+        if indexed != list(SEARCH_FIELDS):
+            conn.exec_driver_sql(f"DROP TABLE {FTS_TABLE}")
+        elif triggers <= existing:
+            return False
+
+    # External content: the index stores only tokens and maps rowids to project_invest
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({names}, "
+        "content='project_invest', tokenize='unicode61 remove_diacritics 2')"
+    )
+    # Triggers are dropped with project_invest (e.g. drop_all); recreate them all
+    for trigger in triggers:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON project_invest BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.rowid, {new_values}); END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON project_invest BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.rowid, {old_values}); END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {names} ON project_invest BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {names}) VALUES ('delete', old.rowid, {old_values}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {names}) VALUES (new.rowid, {new_values}); END"
+    )
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def install(engine: Engine) -> None:
+    """
+    Create the search index for the engine's backend if it is missing (or
+    its configuration changed) and fill it from the existing rows.
+
+    Args:
+        engine: Engine of the application database
+    """
+    installers = {"postgresql": _install_postgresql, "sqlite": _install_sqlite}
+    installer = installers.get(engine.dialect.name)
+    if installer is None:
+        print(f"Warning: full-text search is not available on {engine.dialect.name}")
+        return
+    with engine.begin() as conn:
+        if installer(conn):
+            print("Built full-text search index")
+
+
+def fts5_query(q: str) -> Optional[str]:
+    """
+    Translate web-search syntax into an FTS5 MATCH expression. Every term is
+    quoted, so user input never reaches the FTS5 query grammar.
+
+    Args:
+        q: Search text
+
+    Returns:
+        MATCH expression, or None if the text has no term to look for
+    """
+    positive, negative = [], []
+    pending_or = False
+    for match in _TERM.finditer(q):
+        minus = match.group(1) or match.group(3)
+        term = match.group(2) if match.group(2) is not None else match.group(4)
+        if match.group(4) is not None and term.lower() == "or" and not minus:
+            pending_or = bool(positive)
+            continue
+        if not term.strip():
+            continue
+        quoted = '"' + term.replace('"', '""') + '"'
+        if minus:
+            negative.append(quoted)
+            continue
+        if pending_or:
+            positive[-1] = f"{positive[-1]} OR {quoted}"
+        else:
+            positive.append(quoted)
+        pending_or = False
+    if not positive:
+        return None
+    expression = " AND ".join(f"({p})" for p in positive)
+    for term in negative:
+        expression += f" NOT {term}"
+    return expression
+
+
+def highlight(snippet: Optional[str]) -> Optional[str]:
+    """HTML-escape a snippet and turn the SQL highlight markers into <mark> tags."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def _search_postgresql(db: Session, q: str, filters: list, limit: int, offset: int, columns):
+    P = models.ProjectInvest
+    config = literal_column(f"'{_config()}'::regconfig")
+    tsquery = func.websearch_to_tsquery(config, q)
+    vector = literal_column(f"project_invest.{VECTOR_COLUMN}")
+    matches = vector.op("@@")(tsquery)
+    rank = func.ts_rank_cd(vector, tsquery)
+
+    total = db.scalar(select(func.count()).select_from(P).where(matches, *filters))
+    page = (
+        select(P.id_root, rank.label("rank"))
+        .where(matches, *filters)
+        .order_by(rank.desc(), P.id_root)
+        .limit(limit)
+        .offset(offset)
+        .subquery()
+    )
+    # ts_headline re-parses the documents, so it only runs on the page rows
+    snippet = func.ts_headline(
+        config,
+        func.concat_ws(" … ", *(getattr(P, name) for name in SEARCH_FIELDS)),
+        tsquery,
+        f"StartSel={_START}, StopSel={_STOP}, MaxWords={SNIPPET_WORDS + 8}, MinWords={SNIPPET_WORDS // 2}, "
+        "MaxFragments=2, FragmentDelimiter=\" … \"",
+    )
+    stmt = (
+        select(P, page.c.rank, snippet)
+        .join(page, page.c.id_root == P.id_root)
+        .order_by(page.c.rank.desc(), P.id_root)
+    )
+    if columns:
+        stmt = stmt.options(_load_only(columns))
+    return db.execute(stmt).all(), total
+
+
+def _search_sqlite(db: Session, q: str, filters: list, limit: int, offset: int, columns):
+    P = models.ProjectInvest
+    expression = fts5_query(q)
+    if expression is None:
+        return [], 0
+    fts = table(FTS_TABLE, column("rowid"))
+    on_rowid = fts.c.rowid == literal_column("project_invest.rowid")
+    matches = literal_column(FTS_TABLE).op("MATCH")(expression)
+    bm25 = func.bm25(literal_column(FTS_TABLE), *(_BM25_WEIGHTS[w] for w in SEARCH_FIELDS.values()))
+    snippet = func.snippet(literal_column(FTS_TABLE), -1, _START, _STOP, "…", SNIPPET_WORDS)
+
+    total = db.scalar(select(func.count()).select_from(P).join(fts, on_rowid).where(matches, *filters))
+    stmt = (
+        select(P, (-bm25).label("rank"), snippet)
+        .join(fts, on_rowid)
+        .where(matches, *filters)
+        .order_by(bm25, P.id_root)
+        .limit(limit)
+        .offset(offset)
+    )
+    if columns:
+        stmt = stmt.options(_load_only(columns))
+    return db.execute(stmt).all(), total
+
+
+def search_projects(
+    db: Session,
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    klaster_regional: Optional[str] = None,
+    tahun_rkap: Optional[int] = None,
+    status_issue: Optional[str] = None,
+    columns: Optional[list[str]] = None
+) -> dict:
+    """
+    Rank projects by relevance to a search text, optionally filtered.
+
+    Args:
+        db: Database session
+        q: Search text (web-search syntax)
+        limit: Maximum number of hits to return
+        offset: Number of hits to skip
+        klaster_regional: Filter by regional cluster
+        tahun_rkap: Filter by RKAP year
+        status_issue: Filter by issue status
+        columns: Only load these project columns (None for all)
+
+    Returns:
+        Dictionary with hits (tuples of project, rank, highlighted snippet)
+        in relevance order, and the total number of matches
+    """
+    searches = {"postgresql": _search_postgresql, "sqlite": _search_sqlite}
+    search = searches.get(db.get_bind().dialect.name)
+    if search is None:
+        return {"hits": [], "total": 0}
+    filters = _project_filters(klaster_regional, tahun_rkap, status_issue)
+    rows, total = search(db, q, filters, limit, offset, columns)
+    return {
+        "hits": [(project, float(rank or 0), highlight(snippet)) for project, rank, snippet in rows],
+        "total": total or 0,
+    }
@@ -0,0 +1,140 @@
+"""
+Password hashing and login throttling.
+bcrypt runs on a small dedicated thread pool so logins never block the event
+loop, with a cap on how many verifications may be queued at once, and a
+sliding-window limiter bounds attempts per username and per client IP.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+# bcrypt cost; hashes with a different cost are re-hashed on the next successful login
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+# Threads doing bcrypt work, and verifications allowed to wait for one
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+# Login attempts allowed per window, per username and per client IP (0 disables)
+LOGIN_RATE_LIMIT_WINDOW = float(os.getenv("LOGIN_RATE_LIMIT_WINDOW", "60"))
+LOGIN_RATE_LIMIT_PER_USER = int(os.getenv("LOGIN_RATE_LIMIT_PER_USER", "5"))
+LOGIN_RATE_LIMIT_PER_IP = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "30"))
+# Take the client IP from X-Real-IP (set by the nginx proxy) instead of the socket peer
+LOGIN_TRUST_PROXY_HEADERS = os.getenv("LOGIN_TRUST_PROXY_HEADERS", "false").strip().lower() in ("1", "true", "yes", "on")
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=PASSWORD_BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_pending = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+
+class HashingBusy(Exception):
+    """Raised when too many password operations are already queued."""
+
+
+async def _run_bounded(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _pending.release()
+
+
+async def verify_and_update(password: str, password_hash: str) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password off the event loop.
+
+    Args:
+        password: Plain password from the login form
+        password_hash: Stored hash
+
+    Returns:
+        Tuple of (valid, new_hash); new_hash is set when the stored hash uses
+        outdated settings (e.g. another bcrypt cost) and should be saved
+
+    Raises:
+        HashingBusy: If PASSWORD_HASH_MAX_PENDING operations are already queued
+    """
+    return await _run_bounded(pwd_context.verify_and_update, password, password_hash)
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password off the event loop with the configured cost."""
+    return await _run_bounded(pwd_context.hash, password)
+
+
+class SlidingWindowLimiter:
+    """
+    Counts events per key over a sliding time window.
+
+    Args:
+        limit: Events allowed per window (0 disables the limiter)
+        window: Window length in seconds
+        max_keys: Keys tracked at most; the least recently seen are forgotten
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 10000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._events: OrderedDict[str, deque] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str) -> float:
+        """
+        Record an attempt for key.
+
+        Returns:
+            0 if allowed, otherwise seconds until the next attempt is allowed
+            (rejected attempts are not recorded)
+        """
+        if self.limit <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = deque()
+                while len(self._events) > self.max_keys:
+                    self._events.popitem(last=False)
+            self._events.move_to_end(key)
+            while events and events[0] <= now - self.window:
+                events.popleft()
+            if len(events) >= self.limit:
+                return events[0] + self.window - now
+            events.append(now)
+            return 0.0
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._events.pop(key, None)
+
+
+user_login_limiter = SlidingWindowLimiter(LOGIN_RATE_LIMIT_PER_USER, LOGIN_RATE_LIMIT_WINDOW)
+ip_login_limiter = SlidingWindowLimiter(LOGIN_RATE_LIMIT_PER_IP, LOGIN_RATE_LIMIT_WINDOW)
+
+
+def client_ip(request) -> str:
+    """Client address used for rate limiting."""
+    if LOGIN_TRUST_PROXY_HEADERS and request.headers.get("x-real-ip"):
+        return request.headers["x-real-ip"]
+    return request.client.host if request.client else "unknown"
+
+
+def check_login_rate(username: str, ip: str) -> float:
+    """
+    Count a login attempt against both limits.
+
+    Returns:
+        0 if the attempt may proceed, otherwise the Retry-After delay in seconds
+    """
+    retry_after = ip_login_limiter.hit(ip)
+    if retry_after:
+        return retry_after
+    return user_login_limiter.hit(username.lower())
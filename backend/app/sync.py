@@ -0,0 +1,154 @@
+"""
+Incremental sync of project_invest for clients keeping a local copy.
+
+GET /projects/sync returns the projects written after a watermark, ordered by
+(updated_at, id_root), plus tombstones of the projects deleted after it, and a
+new watermark to send next time. Without a watermark it starts from an empty
+copy: every project, and only the deletions from then on.
+
+updated_at is stamped when a write starts (Python clock, or CURRENT_TIMESTAMP
+in the PostgreSQL trigger), not when it commits, so a slow transaction can
+commit rows older than rows already served. The watermark therefore never
+moves past now - SYNC_SETTLE_SECONDS: changes of the last few seconds are
+sent again on the next sync, and clients apply them idempotently (upsert by
+id_root, delete by id_root).
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.orm import Session, load_only
+
+from . import models
+from .pagination import decode_cursor, encode_cursor
+
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", "30"))
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))     # older watermarks must resync
+
+
+class WatermarkExpiredError(Exception):
+    """Raised when tombstones newer than a watermark may already have been purged."""
+
+    def __init__(self):
+        super().__init__(
+            f"Watermark is older than {SYNC_TOMBSTONE_DAYS} days; discard the local copy and sync without one"
+        )
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """SQLite returns naive UTC, PostgreSQL aware timestamps; keep positions naive UTC."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def record_deletions(db: Session, deleted: Iterable[tuple[str, Optional[str]]]) -> None:
+    """
+    Write tombstones for deleted projects (in the deleting transaction) and
+    purge the ones past retention.
+
+    Args:
+        db: Database session
+        deleted: (id_root, id_investasi) of each deleted project
+    """
+    Tombstone = models.ProjectInvestTombstone
+    now = datetime.utcnow()
+    rows = [{"id_root": id_root, "id_investasi": group, "deleted_at": now} for id_root, group in deleted]
+    if not rows:
+        return
+    db.execute(delete(Tombstone).where(
+        Tombstone.id_root.in_([r["id_root"] for r in rows])
+        | (Tombstone.deleted_at < now - timedelta(days=SYNC_TOMBSTONE_DAYS))
+    ))
+    db.execute(insert(Tombstone), rows)
+
+
+def clear_tombstones(db: Session, id_roots: list[str]) -> None:
+    """Drop the tombstones of re-created projects (in the creating transaction)."""
+    Tombstone = models.ProjectInvestTombstone
+    if id_roots:
+        db.execute(delete(Tombstone).where(Tombstone.id_root.in_(id_roots)))
+
+
+def _page(db: Session, entity, at_column, position: Optional[tuple], limit: int, options=()) -> tuple[list, bool]:
+    """One keyset page ordered by (timestamp, id_root) after position."""
+    stmt = select(entity).where(at_column.isnot(None)).order_by(at_column, entity.id_root).limit(limit + 1)
+    if position is not None:
+        # The leading range lets the (timestamp, id_root) index bound the scan
+        stmt = stmt.where(at_column >= position[0], tuple_(at_column, entity.id_root) > position)
+    rows = db.execute(stmt.options(*options)).scalars().all()
+    return rows[:limit], len(rows) > limit
+
+
+def _advance(position: Optional[tuple], last: Optional[tuple], has_more: bool, horizon: tuple) -> tuple:
+    """Next position of one stream: the last row while paging, else up to the settle horizon."""
+    if has_more:
+        return last
+    if position is None:
+        return horizon
+    return max(position, horizon)
+
+
+def get_changes(
+    db: Session,
+    since: Optional[str] = None,
+    limit: int = 1000,
+    columns: Optional[list[str]] = None
+) -> dict:
+    """
+    Projects changed and deleted after a watermark.
+
+    Args:
+        db: Database session
+        since: Watermark of the previous response (None for a full sync)
+        limit: Maximum number of changed projects, and of tombstones, per response
+        columns: Only load these project columns (None for all)
+
+    Returns:
+        Dictionary with items (changed projects), deleted (tombstone dicts),
+        watermark and has_more (call again right away with the new watermark)
+
+    Raises:
+        ValueError: If the watermark is malformed
+        WatermarkExpiredError: If the watermark predates tombstone retention
+    """
+    P = models.ProjectInvest
+    Tombstone = models.ProjectInvestTombstone
+    now = datetime.utcnow()
+    horizon = (now - timedelta(seconds=SYNC_SETTLE_SECONDS), "")
+
+    if since is None:
+        # An empty copy needs every project but no earlier deletions
+        updated_position, deleted_position = None, horizon
+    else:
+        try:
+            values = decode_cursor(since)["v"]
+        except ValueError:
+            raise ValueError("Malformed watermark")
+        if len(values) != 4 or not all(
+            isinstance(at, datetime) and isinstance(id_root, str) for at, id_root in (values[:2], values[2:])
+        ):
+            raise ValueError("Malformed watermark")
+        updated_position = (_naive_utc(values[0]), values[1])
+        deleted_position = (_naive_utc(values[2]), values[3])
+        if deleted_position[0] < now - timedelta(days=SYNC_TOMBSTONE_DAYS):
+            raise WatermarkExpiredError()
+
+    options = [load_only(*(getattr(P, c) for c in {*columns, "updated_at"}))] if columns else []
+    items, more_items = _page(db, P, P.updated_at, updated_position, limit, options)
+    tombstones, more_deleted = _page(db, Tombstone, Tombstone.deleted_at, deleted_position, limit)
+
+    last_item = (_naive_utc(items[-1].updated_at), items[-1].id_root) if items else None
+    last_deleted = (_naive_utc(tombstones[-1].deleted_at), tombstones[-1].id_root) if tombstones else None
+    updated_position = _advance(updated_position, last_item, more_items, horizon)
+    deleted_position = _advance(deleted_position, last_deleted, more_deleted, horizon)
+    return {
+        "items": items,
+        "deleted": [
+            {"id_root": t.id_root, "id_investasi": t.id_investasi, "deleted_at": t.deleted_at}
+            for t in tombstones
+        ],
+        "watermark": encode_cursor([*updated_position, *deleted_position]),
+        "has_more": more_items or more_deleted,
+    }
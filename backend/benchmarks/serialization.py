@@ -0,0 +1,132 @@
+"""
+Response serialization benchmark for Decimal-heavy list payloads.
+
+Builds N in-memory projects / monitor rows (no database needed) and encodes a
+page of them through the previous pipeline (Pydantic validation from ORM
+attributes, FastAPI's response_model serialization, json.dumps) and through
+the current one (app.serialization: trusted rows encoded with orjson),
+printing rows per second for each.
+
+Usage (from backend/):
+    python -m benchmarks.serialization --rows 1000 10000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, projection, response_cache, schemas, serialization
+
+REPEATS = 5
+
+
+def make_projects(rows: int, seed: int = 42) -> list[models.ProjectInvest]:
+    rnd = random.Random(seed)
+    projects = []
+    for i in range(rows):
+        amounts = {
+            name: Decimal(rnd.randint(0, 10_000_000)) / 100
+            for name, field in schemas.ProjectResponse.model_fields.items()
+            if "Decimal" in str(field.annotation)
+        }
+        created = datetime(2024, 1, 1) + timedelta(minutes=i)
+        projects.append(models.ProjectInvest(
+            id_root=f"P/{i:06d}-001",
+            id_investasi=f"INV-{i:06d}",
+            klaster_regional="Regional 2",
+            entitas_terminal=f"Terminal {i % 40}",
+            project_definition=f"Project {i} " + "x" * rnd.randint(20, 200),
+            type_investasi="Murni",
+            status_issue="Open",
+            tahun_rkap=2025,
+            tgl_mulai_kontrak=date(2024, 1, 1) + timedelta(days=i % 365),
+            created_at=created,
+            updated_at=created,
+            **amounts,
+        ))
+    return projects
+
+
+def make_monitor_rows(rows: int, seed: int = 42) -> list[dict]:
+    rnd = random.Random(seed)
+    page = []
+    for i in range(rows):
+        row = {
+            name: Decimal(rnd.randint(0, 10_000_000)) / 100
+            for name, field in schemas.MonitorInvestItem.model_fields.items()
+            if "float" in str(field.annotation)
+        }
+        row.update(id_virtual=i, ref_id_root=f"P/{i:06d}-001", klaster_regional="Regional 2")
+        page.append(row)
+    return page
+
+
+def time_it(fn) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def before_projects(projects: list) -> bytes:
+    field = create_response_field(name="response", type_=schemas.ProjectListResponse)
+    content = schemas.ProjectListResponse(total=len(projects), items=projects, page=1, page_size=len(projects))
+    value = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(value).body
+
+
+def after_projects(projects: list) -> bytes:
+    return projection.render(projects, None, total=len(projects), page=1, page_size=len(projects))
+
+
+def before_monitor(rows: list) -> bytes:
+    return response_cache._adapter(schemas.MonitorInvestPage).dump_json(
+        response_cache._adapter(schemas.MonitorInvestPage).validate_python(
+            {"items": rows, "next_cursor": None, "limit": len(rows)}
+        )
+    )
+
+
+def after_monitor(rows: list) -> bytes:
+    return serialization.page_encoder(schemas.MonitorInvestItem)(
+        {"items": rows, "next_cursor": None, "limit": len(rows)}
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000])
+    args = parser.parse_args()
+
+    cases = [
+        ("projects", make_projects, before_projects, after_projects),
+        ("monitor", make_monitor_rows, before_monitor, after_monitor),
+    ]
+    print(f"{'payload':<10}{'rows':>8}{'before rows/s':>16}{'after rows/s':>16}{'speedup':>10}{'size KiB':>10}")
+    for name, make, before, after in cases:
+        for rows in args.rows:
+            data = make(rows)
+            slow, fast = time_it(lambda: before(data)), time_it(lambda: after(data))
+            size = len(after(data)) / 1024
+            print(f"{name:<10}{rows:>8}{rows / slow:>16,.0f}{rows / fast:>16,.0f}{slow / fast:>9.1f}x{size:>10,.0f}")
+
+    serialization.JSON_DECIMAL_MODE = "number"
+    for rows in args.rows:
+        data = make_projects(rows)
+        fast = time_it(lambda: after_projects(data))
+        print(f"projects {rows} rows with JSON_DECIMAL_MODE=number: {rows / fast:,.0f} rows/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
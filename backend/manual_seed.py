@@ -1,10 +1,14 @@
-from app.database import engine, Base, SessionLocal
+import asyncio
+
+from app import database
+from app.database import Base, SessionLocal
 from app.main import seed_sample_data
 from app.models import User, ProjectInvest
 
 def manual_seed():
+    asyncio.run(database.wait_for_database())
     print("Creating tables...")
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=database.engine)
     print("Tables created.")
     
     print("Seeding data...")
@@ -0,0 +1,46 @@
+"""Regression tests for the CSV/XLSX project import (app/importer.py)."""
+import io
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import importer, models
+from app.database import Base
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _import(db, body: str) -> dict:
+    return importer.import_projects(db, io.BytesIO(body.encode()), "projects.csv")
+
+
+def test_blank_cells_keep_stored_values(db):
+    _import(db, "id_root,id_investasi,project_definition,rkap\nP/1.1-001,INV-1,Original,1000\n")
+
+    report = _import(db, "id_root,id_investasi,project_definition,rkap\nP/1.1-001,INV-1,Updated,\n")
+
+    assert report["imported"] == 1
+    project = db.get(models.ProjectInvest, "P/1.1-001")
+    db.refresh(project)
+    assert project.project_definition == "Updated"
+    assert project.rkap == 1000
+
+
+def test_blank_cells_use_defaults_for_new_projects(db):
+    _import(db, "id_root,id_investasi,project_definition,rkap\nP/1.1-001,INV-1,Original,1000\n")
+
+    _import(db, "id_root,id_investasi,project_definition,rkap\nP/1.1-001,INV-1,Same,\nP/1.2-001,INV-1,New,\n")
+
+    assert db.get(models.ProjectInvest, "P/1.1-001").rkap == 1000
+    assert db.get(models.ProjectInvest, "P/1.2-001").rkap == 0
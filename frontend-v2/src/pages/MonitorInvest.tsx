@@ -33,8 +33,17 @@ export default function MonitorInvest() {
 
     const fetchData = async () => {
         try {
-            const response = await axios.get("http://localhost:8000/monitor/invest");
-            setData(response.data);
+            // The endpoint is paginated: follow next_cursor until every row is loaded
+            const rows: MonitorData[] = [];
+            let cursor: string | undefined;
+            do {
+                const response = await axios.get("http://localhost:8000/monitor/invest", {
+                    params: { limit: 1000, cursor },
+                });
+                rows.push(...response.data.items);
+                cursor = response.data.next_cursor ?? undefined;
+            } while (cursor);
+            setData(rows);
         } catch (error) {
             console.error("Error fetching data:", error);
         } finally {
@@ -1,13 +1,18 @@
 import { useState, useEffect } from "react"
-import { getMonitorInvestData, MonitorInvestData } from "@/lib/api"
+import { getMonitorInvestData, MonitorInvestData, subscribeToChanges } from "@/lib/api"
+
+// Refetch this long after the last change notification, plus jitter so open
+// dashboards do not all hit the API at the same moment
+const REFRESH_DELAY_MS = 1000
+const REFRESH_JITTER_MS = 2000
 
 export function useMonitorData() {
     const [data, setData] = useState<MonitorInvestData[]>([])
     const [isLoading, setIsLoading] = useState(true)
     const [error, setError] = useState<string | null>(null)
 
-    const fetchData = async () => {
-        setIsLoading(true)
+    const fetchData = async (showLoading = true) => {
+        if (showLoading) setIsLoading(true)
         setError(null)
         try {
             const result = await getMonitorInvestData()
@@ -21,7 +26,18 @@ export function useMonitorData() {
 
     useEffect(() => {
         fetchData()
+
+        // Live updates: refresh in the background when projects change
+        let timer: ReturnType<typeof setTimeout> | undefined
+        const unsubscribe = subscribeToChanges(() => {
+            clearTimeout(timer)
+            timer = setTimeout(() => fetchData(false), REFRESH_DELAY_MS + Math.random() * REFRESH_JITTER_MS)
+        })
+        return () => {
+            clearTimeout(timer)
+            unsubscribe()
+        }
     }, [])
 
-    return { data, isLoading, error, refetch: fetchData }
+    return { data, isLoading, error, refetch: () => fetchData() }
 }
@@ -133,11 +133,45 @@ export interface MonitorInvestData {
     updated_at: string | null
 }
 
-export async function getMonitorInvestData(): Promise<MonitorInvestData[]> {
-    const response = await api.get<MonitorInvestData[]>("/monitor/invest")
+export interface MonitorInvestPage {
+    items: MonitorInvestData[]
+    next_cursor: string | null
+    limit: number
+}
+
+export interface MonitorInvestParams {
+    limit?: number
+    cursor?: string
+    sort_by?: string
+    sort_dir?: "asc" | "desc"
+    klaster_regional?: string[]
+    tahun_rkap?: number[]
+    status_issue?: string[]
+    type_investasi?: string[]
+    entitas_terminal?: string[]
+    q?: string
+}
+
+export async function getMonitorInvestPage(params: MonitorInvestParams = {}): Promise<MonitorInvestPage> {
+    const response = await api.get<MonitorInvestPage>("/monitor/invest", {
+        params,
+        // FastAPI expects repeated keys for list filters (?klaster_regional=a&klaster_regional=b)
+        paramsSerializer: { indexes: null },
+    })
     return response.data
 }
 
+export async function getMonitorInvestData(params: Omit<MonitorInvestParams, "cursor"> = {}): Promise<MonitorInvestData[]> {
+    const rows: MonitorInvestData[] = []
+    let cursor: string | undefined
+    do {
+        const page = await getMonitorInvestPage({ limit: 1000, ...params, cursor })
+        rows.push(...page.items)
+        cursor = page.next_cursor ?? undefined
+    } while (cursor)
+    return rows
+}
+
 // Projects API
 export interface ProjectData {
     id_root: string
@@ -231,6 +265,40 @@ export async function deleteProject(idRoot: string): Promise<void> {
     await api.delete(`/projects/${encodeURIComponent(idRoot)}`)
 }
 
+export interface ProjectChangeEvent {
+    action: "create" | "update" | "delete" | "import" | "rebuild"
+    id_roots: string[]
+    id_investasi: string[]
+    fields: string[]
+    count: number
+    truncated: boolean
+    at: string
+}
+
+// Live change notifications (server-sent events); `null` means changes were
+// missed and everything should be refetched. Returns a function closing the stream.
+export function subscribeToChanges(onChange: (change: ProjectChangeEvent | null) => void): () => void {
+    const source = new EventSource(`${API_BASE_URL}/projects/feed`)
+    source.addEventListener("change", (event) => onChange(JSON.parse((event as MessageEvent).data)))
+    source.addEventListener("resync", () => onChange(null))
+    return () => source.close()
+}
+
+export interface ProjectSyncResponse {
+    items: ProjectData[]
+    deleted: { id_root: string; id_investasi: string | null; deleted_at: string }[]
+    watermark: string
+    has_more: boolean
+}
+
+// Changes since the watermark of the previous sync (omit it for a full copy)
+export async function syncProjects(since?: string, limit = 1000): Promise<ProjectSyncResponse> {
+    const response = await api.get<ProjectSyncResponse>("/projects/sync", {
+        params: { since, limit }
+    })
+    return response.data
+}
+
 export async function getProjectsByInvestasi(idInvestasi: string): Promise<ProjectData[]> {
     const response = await api.get<ProjectData[]>(`/projects/invest-projects/${encodeURIComponent(idInvestasi)}`)
     return response.data
@@ -246,3 +314,19 @@ export async function getFilterOptions(): Promise<FilterOptionsResponse> {
     const response = await api.get<FilterOptionsResponse>('/projects/filter-options')
     return response.data
 }
+
+export type AutocompleteField = "entitas_terminal" | "pic" | "penyedia_jasa" | "asset_categories" | "id_investasi"
+
+export interface AutocompleteResponse {
+    field: AutocompleteField
+    query: string
+    matched: number
+    items: { value: string; count: number }[]
+}
+
+export async function getAutocomplete(field: AutocompleteField, q = "", limit = 10): Promise<AutocompleteResponse> {
+    const response = await api.get<AutocompleteResponse>('/projects/autocomplete', {
+        params: { field, q, limit }
+    })
+    return response.data
+}
@@ -57,6 +57,21 @@ export const projectAPI = {
         return fetchAPI(`/projects?${params.toString()}`)
     },
 
+    /**
+     * Full-text search, most relevant first (same filters as getProjects)
+     */
+    async searchProjects({ q, page = 1, pageSize = 20, klasterRegional, tahunRkap, statusIssue } = {}) {
+        const params = new URLSearchParams()
+        params.append('q', q)
+        params.append('limit', pageSize)
+        params.append('offset', (page - 1) * pageSize)
+        if (klasterRegional) params.append('klaster_regional', klasterRegional)
+        if (tahunRkap) params.append('tahun_rkap', tahunRkap)
+        if (statusIssue) params.append('status_issue', statusIssue)
+
+        return fetchAPI(`/projects/search?${params.toString()}`)
+    },
+
     /**
      * Get single project by ID
      */
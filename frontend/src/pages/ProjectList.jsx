@@ -31,6 +31,8 @@ import {
     DialogTitle,
 } from '@/components/ui/dialog'
 
+const SEARCH_DEBOUNCE_MS = 300
+
 export default function ProjectList() {
     const [searchParams, setSearchParams] = useSearchParams()
     const [projects, setProjects] = useState([])
@@ -46,31 +48,48 @@ export default function ProjectList() {
     const statusIssue = searchParams.get('status_issue') || ''
     const searchQuery = searchParams.get('q') || ''
 
+    // Wait for typing to pause before searching
+    const [debouncedQuery, setDebouncedQuery] = useState(searchQuery)
+    useEffect(() => {
+        const timer = setTimeout(() => setDebouncedQuery(searchQuery), SEARCH_DEBOUNCE_MS)
+        return () => clearTimeout(timer)
+    }, [searchQuery])
+
+    // Fetch stats (independent of filters and search)
+    useEffect(() => {
+        projectAPI.getStats()
+            .then(setStats)
+            .catch((err) => setError(err.message))
+    }, [])
+
     // Fetch projects
     useEffect(() => {
+        // Responses of superseded requests (earlier text, page or filter) are ignored
+        let stale = false
         async function fetchData() {
             try {
                 setLoading(true)
-                const [projectsData, statsData] = await Promise.all([
-                    projectAPI.getProjects({
-                        page,
-                        pageSize,
-                        statusIssue: statusIssue || undefined,
-                    }),
-                    projectAPI.getStats()
-                ])
+                // Server-side full-text search from 2 characters on
+                const query = debouncedQuery.trim()
+                const listParams = { page, pageSize, statusIssue: statusIssue || undefined }
+                const projectsData = query.length >= 2
+                    ? await projectAPI.searchProjects({ q: query, ...listParams })
+                    : await projectAPI.getProjects(listParams)
+                if (stale) return
                 setProjects(projectsData.items)
                 setTotalProjects(projectsData.total)
-                setStats(statsData)
                 setError(null)
             } catch (err) {
-                setError(err.message)
+                if (!stale) setError(err.message)
             } finally {
-                setLoading(false)
+                if (!stale) setLoading(false)
             }
         }
         fetchData()
-    }, [page, statusIssue])
+        return () => {
+            stale = true
+        }
+    }, [page, statusIssue, debouncedQuery])
 
     // Handle delete
     const handleDelete = async () => {
@@ -104,17 +123,6 @@ export default function ProjectList() {
         setSearchParams(params)
     }
 
-    // Filter projects by search query (client-side for simplicity)
-    const filteredProjects = projects.filter(project => {
-        if (!searchQuery) return true
-        const query = searchQuery.toLowerCase()
-        return (
-            project.project_definition?.toLowerCase().includes(query) ||
-            project.id_investasi?.toLowerCase().includes(query) ||
-            project.entitas_terminal?.toLowerCase().includes(query)
-        )
-    })
-
     return (
         <div className="space-y-6">
             {/* Stats Cards */}
@@ -227,14 +235,14 @@ export default function ProjectList() {
                                 </TableRow>
                             </TableHeader>
                             <TableBody>
-                                {filteredProjects.length === 0 ? (
+                                {projects.length === 0 ? (
                                     <TableRow>
                                         <TableCell colSpan={7} className="text-center py-12 text-muted-foreground">
                                             Tidak ada project ditemukan
                                         </TableCell>
                                     </TableRow>
                                 ) : (
-                                    filteredProjects.map((project) => (
+                                    projects.map((project) => (
                                         <TableRow key={project.id_root}>
                                             <TableCell className="font-medium">{project.id_investasi}</TableCell>
                                             <TableCell className="max-w-[250px] truncate">